@@ -0,0 +1,94 @@
+"""
+recommend_size: 정확한 계산(exact)과 몬테카를로(mc) 비교.
+
+1) 같은 아이/날짜에서 두 방식의 사이즈별 확률 차이가 몬테카를로 오차 안인지 확인
+2) 요청 1건당 걸리는 시간 비교
+
+사용법 (이 폴더에서, 성장도표 파일이 있어야 함):
+    python bench_recommend_size.py [반복 횟수]
+"""
+import importlib.util
+import pathlib
+import sys
+import time
+
+import numpy as np
+
+path = pathlib.Path(__file__).resolve().parent / "성장_추적_가우시안_몬테카를로.py"
+spec = importlib.util.spec_from_file_location("growth", path)
+growth = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(growth)
+
+# (성별, 출생일, 2025-11-23 측정 키 (None이면 관측 없음), 추천 기준일, 사이즈 경계에 걸치는지)
+# 관측이 하나 있으면 posterior 키 SD가 1cm 미만이라 대부분 0/1 확률이 나온다.
+# 경계 확률을 검증하려면 관측 없는 아이(theta_var=1)나 경계(95, 105cm)에 딱 걸친 키가 필요하다
+CASES = [
+    (2, "2022-11-22", 97, "2026-06-01", False),
+    (2, "2022-01-28", 87, "2024-01-01", False),
+    (1, "2021-11-01", None, "2025-11-23", True),
+    (2, "2021-05-01", 95, "2025-11-23", True),
+    (1, "2020-11-01", 105, "2025-11-23", True),
+]
+
+
+def make_child(sex_code, birth, height):
+    child = growth.ChildGrowthModel(sex_code=sex_code, birth_date=birth)
+    if height is not None:
+        child.observe("2025-11-23", height)
+    return child
+
+
+def check_equivalence(n_samples=200_000):
+    for sex_code, birth, height, target, straddles in CASES:
+        child = make_child(sex_code, birth, height)
+        exact_best, exact_df, _ = growth.recommend_size(child, target, method="exact")
+        _, mc_df, _ = growth.recommend_size(child, target, n_samples=n_samples, method="mc")
+        exact = exact_df.set_index("size_code")["prob"]
+        mc = mc_df.set_index("size_code")["prob"].reindex(exact.index)
+        if straddles:
+            # 0/1만 나오면 비교하는 의미가 없다
+            assert ((exact > 0.05) & (exact < 0.95)).any(), (birth, exact.to_dict())
+        # 이항 표준오차의 5배를 허용 오차로 사용
+        tolerance = 5 * np.sqrt(exact * (1 - exact) / n_samples) + 1e-4
+        assert ((exact - mc).abs() <= tolerance).all(), (birth, exact.to_dict(), mc.to_dict())
+        print(f"sex={sex_code} birth={birth} height={height} -> best={exact_best}, "
+              f"exact={np.round(exact.to_numpy(), 3).tolist()}, max |exact - mc| = {(exact - mc).abs().max():.4f}")
+
+
+def timed(func, repeat) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) * 1000 / repeat
+
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    check_equivalence()
+    sex_code, birth, height, target, _ = CASES[2]
+    child = make_child(sex_code, birth, height)
+
+    # recommend_size 전체: 날짜 해석, LMS 조회, DataFrame 생성/정렬이 대부분이라 차이가 작다
+    exact_ms = timed(lambda: growth.recommend_size(child, target, method="exact"), repeat)
+    mc_ms = timed(lambda: growth.recommend_size(child, target, method="mc"), repeat)
+    print(f"recommend_size: exact {exact_ms:7.3f}ms/req, mc(5000) {mc_ms:7.3f}ms/req ({mc_ms / exact_ms:5.1f}x) "
+          f"- pandas 오버헤드 포함")
+
+    # 확률 계산 부분만
+    L, M, S = growth.get_lms(child._age_in_months(growth.pd.to_datetime(target)), sex_code)
+    theta_mean, theta_var = child.get_theta_posterior()
+    h_min = growth.size_table["height_min"].to_numpy()[:, None]
+    h_max = growth.size_table["height_max"].to_numpy()[:, None]
+
+    def mc_probabilities():
+        z = growth.norm.rvs(loc=theta_mean, scale=np.sqrt(theta_var), size=5000)
+        heights = growth.z_to_height(z, L, M, S)
+        return np.mean((heights >= h_min) & (heights < h_max), axis=1)
+
+    exact_ms = timed(lambda: growth.size_band_probabilities(theta_mean, theta_var, L, M, S), repeat)
+    mc_ms = timed(mc_probabilities, repeat)
+    print(f"확률 계산만:    exact {exact_ms:7.3f}ms/req, mc(5000) {mc_ms:7.3f}ms/req ({mc_ms / exact_ms:5.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
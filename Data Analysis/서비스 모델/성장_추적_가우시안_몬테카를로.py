@@ -38,38 +38,131 @@ def map_sex_to_lms_code(sex_value):
         return 1
 
 
+class LMSTable:
+    """
+    성장도표를 [성별, 만나이(개월)]로 바로 인덱싱되는 NumPy 배열로 한 번만 변환해 둔 표.
+    조회할 때마다 DataFrame 전체를 필터링하지 않고 배열 인덱싱(gather)만 한다.
+
+    - L, M, S: shape (3, max_age + 1). 성별 코드 1/2를 그대로 첫 번째 인덱스로 사용
+    - 성장도표에 없는 칸은 NaN
+    """
+    def __init__(self, df):
+        # 성장도표 첫 줄은 부제목 행이라 값이 비어 있다. 숫자가 아닌 행은 뺀다
+        columns = ["성별", "만나이(개월)", "L", "M", "S"]
+        df = df[columns].apply(pd.to_numeric, errors="coerce").dropna(subset=columns)
+        # 같은 (성별, 개월)이 여러 줄이면 기존 get_lms처럼 첫 번째 줄을 사용
+        df = df.drop_duplicates(["성별", "만나이(개월)"], keep="first")
+        sex = df["성별"].to_numpy(dtype=int)
+        age = df["만나이(개월)"].to_numpy(dtype=float)
+        if np.any(age != np.round(age)):
+            raise ValueError("만나이(개월)은 정수 개월이어야 합니다")
+        age = age.astype(int)
+
+        self.max_age = int(age.max())
+        shape = (3, self.max_age + 1)
+        self.L = np.full(shape, np.nan)
+        self.M = np.full(shape, np.nan)
+        self.S = np.full(shape, np.nan)
+        for column, table in [("L", self.L), ("M", self.M), ("S", self.S)]:
+            table[sex, age] = df[column].to_numpy(dtype=float)
+
+    def _check(self, sex_code, age_month):
+        if np.any((sex_code != 1) & (sex_code != 2)):
+            raise ValueError(f"Unknown sex code: {np.unique(sex_code[(sex_code != 1) & (sex_code != 2)])}")
+        out = (age_month < 0) | (age_month > self.max_age)
+        if np.any(out):
+            raise ValueError(f"age_month out of range [0, {self.max_age}]: {np.unique(age_month[out])}")
+
+    def contains(self, age_month, sex_code):
+        """
+        (정수 개월, 성별) 쌍마다 성장도표에 값이 있는지 (bool 배열). 예외를 던지지 않는다.
+        """
+        age_month = np.asarray(age_month, dtype=float)
+        sex_code = np.asarray(sex_code)
+        age_month, sex_code = np.broadcast_arrays(age_month, sex_code)
+        ok = ((sex_code == 1) | (sex_code == 2)) & (age_month >= 0) & (age_month <= self.max_age) \
+            & (age_month == np.round(age_month))
+        found = np.zeros(age_month.shape, dtype=bool)
+        sex, age = sex_code[ok].astype(int), age_month[ok].astype(int)
+        found[ok] = ~(np.isnan(self.L[sex, age]) | np.isnan(self.M[sex, age]) | np.isnan(self.S[sex, age]))
+        return found
+
+    def lookup(self, age_month, sex_code, interpolate=False):
+        """
+        (만나이(개월), 성별) 배열 쌍에 대한 L, M, S 배열 (broadcast 가능).
+        interpolate=True면 소수 개월을 앞뒤 개월 사이에서 선형 보간한다.
+        범위를 벗어나거나 성장도표에 없는 값이면 ValueError.
+        """
+        age_month = np.asarray(age_month, dtype=float)
+        sex_code = np.asarray(sex_code, dtype=int)
+        age_month, sex_code = np.broadcast_arrays(age_month, sex_code)
+        self._check(sex_code, age_month)
+
+        if interpolate:
+            lo = np.floor(age_month).astype(int)
+            hi = np.minimum(lo + 1, self.max_age)
+            w = age_month - lo
+            L, M, S = [(1 - w) * t[sex_code, lo] + w * t[sex_code, hi] for t in (self.L, self.M, self.S)]
+            # 가중치가 0인 쪽이 NaN이면 그 값은 쓰지 않는다
+            exact = w == 0
+            L, M, S = [np.where(exact, t[sex_code, lo], v) for t, v in zip((self.L, self.M, self.S), (L, M, S))]
+        else:
+            if np.any(age_month != np.round(age_month)):
+                raise ValueError("age_month must be whole months (use interpolate=True)")
+            index = age_month.astype(int)
+            L, M, S = self.L[sex_code, index], self.M[sex_code, index], self.S[sex_code, index]
+
+        missing = np.isnan(L) | np.isnan(M) | np.isnan(S)
+        if np.any(missing):
+            pairs = sorted(set(zip(sex_code[missing].tolist(), age_month[missing].tolist())))
+            raise ValueError(f"LMS not found for (sex, age_month)={pairs[:10]}")
+        return L, M, S
+
+
+lms_table = LMSTable(growth_df)
+
+
 def get_lms(age_month, sex_code):
     """
     성장도표에서 성별(1/2), 만나이(개월)에 맞는 L, M, S 파라미터를 가져옴.
+    배열을 넘기면 같은 shape의 L, M, S 배열을 돌려준다. (lms_table.lookup)
     """
-    row = growth_df[(growth_df["성별"] == sex_code) &
-                    (growth_df["만나이(개월)"] == age_month)]
-    if row.empty:
-        raise ValueError(f"LMS not found for sex={sex_code}, age_month={age_month}")
-    row = row.iloc[0]
-    return row["L"], row["M"], row["S"]
+    L, M, S = lms_table.lookup(age_month, sex_code)
+    if L.ndim == 0:
+        return float(L), float(M), float(S)
+    return L, M, S
 
 
 def height_to_z(height, L, M, S):
     """
     실제 키(cm) -> z-score (LMS 변환)
+    height, L, M, S 모두 배열 가능 (broadcast). L == 0인 원소는 log 변환.
     """
-    height = np.array(height, dtype=float)
-    if L != 0:
-        return ((height / M) ** L - 1) / (L * S)
-    else:
-        return np.log(height / M) / S
+    height = np.asarray(height, dtype=float)
+    L = np.asarray(L, dtype=float)
+    # L == 0인 자리는 0으로 나누지 않도록 1로 바꿔 계산하고 np.where로 버린다
+    L_safe = np.where(L == 0, 1.0, L)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(L == 0,
+                        np.log(height / M) / S,
+                        ((height / M) ** L_safe - 1) / (L_safe * S))
 
 
 def z_to_height(z, L, M, S):
     """
     z-score -> 실제 키(cm) (LMS 역변환)
+    z, L, M, S 모두 배열 가능 (broadcast). L == 0인 원소는 exp 변환.
+    z가 float32면 결과도 float32 (시뮬레이션 메모리 절약용)
     """
-    z = np.array(z, dtype=float)
-    if L != 0:
-        return M * (1 + L * S * z) ** (1 / L)
-    else:
-        return M * np.exp(S * z)
+    z = np.asarray(z)
+    dtype = z.dtype if z.dtype == np.float32 else np.float64
+    z = z.astype(dtype, copy=False)
+    L, M, S = [np.asarray(v, dtype=dtype) for v in (L, M, S)]
+    L_safe = np.where(L == 0, 1.0, L)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(L == 0,
+                        M * np.exp(S * z),
+                        M * (1 + L_safe * S * z) ** (1 / L_safe))
 
 
 # ============================================
@@ -146,6 +239,150 @@ class ChildGrowthModel:
         return self.theta_mean, self.theta_var
 
 
+def _month_index(dates):
+    """
+    날짜(들) -> year * 12 + (month - 1). 만나이(개월) 계산용
+    """
+    dates = pd.to_datetime(dates)
+    if isinstance(dates, pd.Timestamp):
+        return dates.year * 12 + dates.month - 1
+    dates = pd.DatetimeIndex(dates)
+    return (dates.year * 12 + dates.month - 1).to_numpy()
+
+
+class CohortGrowthModel:
+    """
+    ChildGrowthModel을 아이 수만큼 만들지 않고, 전체 아이의
+    theta 평균/분산, 성별, 출생일을 NumPy 배열(struct-of-arrays)로 들고 있는 모델.
+    LMS 조회, z 변환, 베이즈 업데이트를 전체 아이에 대해 한 번에 계산한다.
+    """
+    def __init__(self, sex_code, birth_date,
+                 prior_mean=0.0, prior_var=1.0,
+                 obs_var=0.2**2, keys=None):
+        """
+        sex_code: 아이별 성장도표 성별 코드 배열 (1=남, 2=여)
+        birth_date: 아이별 출생일 배열
+        keys: 아이별 식별자 리스트 (예: (nickname, baby index))
+        """
+        self.sex_code = np.asarray(sex_code, dtype=int)
+        self.birth_date = pd.DatetimeIndex(pd.to_datetime(birth_date)).to_numpy()
+        self.birth_month = _month_index(self.birth_date)
+        n = len(self.sex_code)
+        self.theta_mean = np.full(n, prior_mean, dtype=float)
+        self.theta_var = np.full(n, prior_var, dtype=float)
+        self.obs_var = obs_var
+        # 마지막 관측일. 관측이 없으면 NaT
+        self.last_date = np.full(n, np.datetime64("NaT"), dtype="datetime64[ns]")
+        self.keys = list(keys) if keys is not None else list(range(n))
+
+    def __len__(self):
+        return len(self.sex_code)
+
+    def age_in_months(self, date, index=None):
+        """
+        date 기준 만나이(개월) 배열. date는 하나 또는 아이별 배열.
+        """
+        birth_month = self.birth_month if index is None else self.birth_month[index]
+        return np.maximum(_month_index(date) - birth_month, 0)
+
+    def observe(self, date, height_cm, index=None):
+        """
+        index의 아이들(기본: 전체)에 키 관측을 한 번에 반영.
+        height_cm이 NaN이거나 성장도표 범위를 벗어나는 아이는 건너뛴다.
+
+        return: 아이별 z_obs (건너뛴 아이는 NaN)
+        """
+        index = np.arange(len(self)) if index is None else np.asarray(index)
+        height = np.broadcast_to(np.asarray(height_cm, dtype=float), index.shape)
+        dates = np.broadcast_to(pd.DatetimeIndex(pd.to_datetime(np.atleast_1d(date))).to_numpy(), index.shape)
+        age = self.age_in_months(dates, index)
+        sex = self.sex_code[index]
+
+        valid = ~np.isnan(height) & lms_table.contains(age, sex)
+        skipped = ~np.isnan(height) & ~valid
+        if np.any(skipped):
+            keys = [self.keys[i] for i in index[skipped][:10]]
+            print(f"[WARN] observe 실패 {skipped.sum()}건 - LMS not found, keys={keys}")
+
+        z_obs = np.full(index.shape, np.nan)
+        L, M, S = lms_table.lookup(age[valid], sex[valid])
+        z_obs[valid] = height_to_z(height[valid], L, M, S)
+
+        # 정규-정규 conjugate 업데이트 (관측이 있는 아이만)
+        target = index[valid]
+        prior_mean = self.theta_mean[target]
+        prior_var = self.theta_var[target]
+        post_var = 1.0 / (1.0/prior_var + 1.0/self.obs_var)
+        post_mean = post_var * (prior_mean/prior_var + z_obs[valid]/self.obs_var)
+        self.theta_mean[target] = post_mean
+        self.theta_var[target] = post_var
+        previous = self.last_date[target]
+        self.last_date[target] = np.where(np.isnat(previous) | (previous < dates[valid]), dates[valid], previous)
+
+        return z_obs
+
+    def get_theta_posterior(self):
+        """
+        아이별 theta posterior (평균 배열, 분산 배열)
+        """
+        return self.theta_mean, self.theta_var
+
+    def child(self, i):
+        """
+        i번째 아이를 ChildGrowthModel로 꺼낸다. (사이즈 추천/궤적 시뮬레이션용)
+        """
+        model = ChildGrowthModel(sex_code=int(self.sex_code[i]),
+                                 birth_date=self.birth_date[i],
+                                 prior_mean=float(self.theta_mean[i]),
+                                 prior_var=float(self.theta_var[i]),
+                                 obs_var=self.obs_var)
+        if not np.isnat(self.last_date[i]):
+            date = pd.Timestamp(self.last_date[i])
+            model.history.append({
+                "date": date,
+                "age_month": model._age_in_months(date),
+                "height_cm": None,
+                "z_obs": None,
+                "theta_mean": model.theta_mean,
+                "theta_var": model.theta_var
+            })
+        return model
+
+    @classmethod
+    def from_users(cls, user_records, measurement_date=None, **kwargs):
+        """
+        DB 유저 레코드 전체 -> 코호트 모델 하나. keys는 (nickname, baby index).
+        DB에 저장된 height는 measurement_date(기본: 오늘)의 관측으로 한 번에 반영한다.
+        """
+        if measurement_date is None:
+            measurement_date = pd.Timestamp.today()
+
+        keys, sexes, births, heights = [], [], [], []
+        for user in user_records:
+            for baby_idx, baby in enumerate(user.get("baby", [])):
+                # 필수 정보 없으면 스킵
+                if baby.get("birth") is None or baby.get("sex") is None:
+                    continue
+                keys.append((user.get("nickname"), baby_idx))
+                sexes.append(map_sex_to_lms_code(baby["sex"]))
+                births.append(baby["birth"])
+                height = baby.get("height")
+                heights.append(np.nan if height is None else height)
+
+        # 값마다 형식이 다를 수 있으므로 하나씩 해석 (ChildGrowthModel과 같게)
+        births = pd.to_datetime(pd.Series(births, dtype=object), format="mixed", errors="coerce")
+        parsed = births.notna().to_numpy()
+        if not parsed.all():
+            print(f"[WARN] birth 파싱 실패 - keys={[k for k, ok in zip(keys, parsed) if not ok][:10]}")
+
+        cohort = cls(sex_code=np.asarray(sexes, dtype=int)[parsed],
+                     birth_date=births[parsed],
+                     keys=[k for k, ok in zip(keys, parsed) if ok],
+                     **kwargs)
+        cohort.observe(measurement_date, np.asarray(heights, dtype=float)[parsed])
+        return cohort
+
+
 # ============================================
 # 3. DB JSON 구조를 성장 모델로 변환 (nickname 기준)
 # ============================================
@@ -176,43 +413,12 @@ def build_growth_models_from_users(user_records, measurement_date=None):
         nickname: [ChildGrowthModel, ChildGrowthModel, ...]  # baby index 순서
       }
     """
-    if measurement_date is None:
-        measurement_date = pd.Timestamp.today()
-    else:
-        measurement_date = pd.to_datetime(measurement_date)
+    # 전체 아이를 코호트 모델로 한 번에 업데이트한 뒤 아이별 모델로 나눈다
+    cohort = CohortGrowthModel.from_users(user_records, measurement_date)
     
-    growth_models = {}
-    
-    for user in user_records:
-        nickname = user.get("nickname")
-        babies = user.get("baby", [])
-        
-        models_for_user = []
-        
-        for baby_idx, baby in enumerate(babies):
-            birth = baby.get("birth")
-            height = baby.get("height", None)
-            sex_raw = baby.get("sex", None)
-            
-            # 필수 정보 없으면 스킵
-            if birth is None or sex_raw is None:
-                continue
-            
-            # DB 성별 코드 → 성장도표 성별 코드(1/2)
-            sex_code = map_sex_to_lms_code(sex_raw)
-            
-            model = ChildGrowthModel(sex_code=sex_code, birth_date=birth)
-            
-            # DB에 저장된 height를 measurement_date 기준 관측으로 사용
-            if height is not None:
-                try:
-                    model.observe(measurement_date, height)
-                except Exception as e:
-                    print(f"[WARN] observe 실패 - nickname={nickname}, baby_idx={baby_idx}, err={e}")
-            
-            models_for_user.append(model)
-        
-        growth_models[nickname] = models_for_user
+    growth_models = {user.get("nickname"): [] for user in user_records}
+    for i, (nickname, _) in enumerate(cohort.keys):
+        growth_models[nickname].append(cohort.child(i))
     
     return growth_models
 
@@ -230,31 +436,52 @@ size_table = pd.DataFrame([
 ])
 
 
-def recommend_size(child_model, target_date, n_samples=5000):
+def size_band_probabilities(theta_mean, theta_var, L, M, S):
     """
-    특정 날짜(target_date)를 기준으로, 아이의 키 분포를 몬테카를로로 생성하고
-    각 사이즈별로 '키가 그 범위에 들어갈 확률'을 계산한 뒤
-    가장 확률이 높은 사이즈를 추천.
+    z ~ N(theta_mean, theta_var)일 때 키가 size_table의 각 사이즈 범위에 들어갈 정확한 확률.
+    LMS 변환은 z에 대해 단조 증가이므로, 범위 경계(height_min/max)를 z로 바꾼 뒤
+    정규분포 CDF 차이로 계산한다.
+
+    theta_mean, theta_var, L, M, S가 shape (n,)이면 결과는 (n, 사이즈 수)
+    """
+    theta_mean = np.asarray(theta_mean, dtype=float)[..., None]
+    theta_sd = np.sqrt(np.asarray(theta_var, dtype=float))[..., None]
+    L, M, S = [np.asarray(v, dtype=float)[..., None] for v in (L, M, S)]
+    z_min = height_to_z(size_table["height_min"].to_numpy(dtype=float), L, M, S)
+    z_max = height_to_z(size_table["height_max"].to_numpy(dtype=float), L, M, S)
+    return norm.cdf(z_max, theta_mean, theta_sd) - norm.cdf(z_min, theta_mean, theta_sd)
+
+
+def recommend_size(child_model, target_date, n_samples=5000, method="exact"):
+    """
+    특정 날짜(target_date)를 기준으로, 각 사이즈별로
+    '키가 그 범위에 들어갈 확률'을 계산한 뒤 가장 확률이 높은 사이즈를 추천.
+
+    method:
+      - "exact": 정규분포 CDF로 정확히 계산 (기본). height_samples는 None
+      - "mc": theta posterior에서 n_samples개를 뽑는 몬테카를로 (분포 그림용)
     """
     target_date = pd.to_datetime(target_date)
     age_month = child_model._age_in_months(target_date)
     L, M, S = get_lms(age_month, child_model.sex_code)
-    
-    # 개인 z 위치 theta posterior에서 샘플링
     theta_mean, theta_var = child_model.get_theta_posterior()
-    theta_samples = norm.rvs(loc=theta_mean, scale=np.sqrt(theta_var), size=n_samples)
-    z_samples = theta_samples  # 개인 위치를 유지한다고 가정
-    height_samples = z_to_height(z_samples, L, M, S)
     
-    probs = []
-    for _, row in size_table.iterrows():
-        code = row["size_code"]
-        h_min = row["height_min"]
-        h_max = row["height_max"]
-        prob = np.mean((height_samples >= h_min) & (height_samples < h_max))
-        probs.append({"size_code": code, "prob": prob})
+    if method == "exact":
+        height_samples = None
+        prob = size_band_probabilities(theta_mean, theta_var, L, M, S)
+    elif method == "mc":
+        # 개인 z 위치 theta posterior에서 샘플링
+        theta_samples = norm.rvs(loc=theta_mean, scale=np.sqrt(theta_var), size=n_samples)
+        z_samples = theta_samples  # 개인 위치를 유지한다고 가정
+        height_samples = z_to_height(z_samples, L, M, S)
+        h_min = size_table["height_min"].to_numpy()[:, None]
+        h_max = size_table["height_max"].to_numpy()[:, None]
+        prob = np.mean((height_samples >= h_min) & (height_samples < h_max), axis=1)
+    else:
+        raise ValueError(f"Unknown method: {method}")
     
-    prob_df = pd.DataFrame(probs).sort_values("prob", ascending=False)
+    prob_df = pd.DataFrame({"size_code": size_table["size_code"], "prob": prob}) \
+        .sort_values("prob", ascending=False, kind="stable")
     best_size = prob_df.iloc[0]["size_code"]
     
     return best_size, prob_df, height_samples
@@ -264,44 +491,145 @@ def recommend_size(child_model, target_date, n_samples=5000):
 # 5. 몬테카를로 성장 궤적 시뮬레이션 (옵션)
 # ============================================
 
+def _simulate_heights(rng, theta_mean, theta_var, sex_code, base_age,
+                      months_ahead, n_samples, process_std, dtype):
+    """
+    아이 n명의 키 궤적을 행렬 연산 한 번으로 시뮬레이션.
+
+    z[i, s, m] = theta_0 + (process noise 1..m 누적합)
+    만나이는 base_age + m이므로 L, M, S도 (n, months_ahead + 1)로 한 번에 가져온다.
+
+    return: (만나이 (n, months_ahead + 1), 키 샘플 (n, n_samples, months_ahead + 1))
+    """
+    age = np.asarray(base_age)[:, None] + np.arange(months_ahead + 1)
+    L, M, S = lms_table.lookup(age, np.asarray(sex_code)[:, None])
+
+    z = rng.standard_normal((len(age), n_samples, months_ahead + 1), dtype=dtype)
+    # 0번째 열은 theta posterior 샘플, 나머지는 월별 랜덤 워크 증분
+    z[:, :, 1:] *= process_std
+    z[:, :, 0] *= np.sqrt(np.asarray(theta_var, dtype=dtype))[:, None]
+    z[:, :, 0] += np.asarray(theta_mean, dtype=dtype)[:, None]
+    np.cumsum(z, axis=2, out=z)
+
+    heights = z_to_height(z, L[:, None, :], M[:, None, :], S[:, None, :])
+    return age, heights
+
+
+def _stream_summaries(rng, theta_mean, theta_var, sex_code, base_age,
+                      months_ahead, n_samples, process_std, dtype):
+    """
+    _simulate_heights와 같은 모델이지만 한 달씩 진행하면서 바로 요약하고 샘플은 버린다.
+    메모리는 현재 달의 샘플 (n, n_samples)과 요약값 (n, months_ahead + 1)뿐.
+    (같은 seed라도 난수 뽑는 순서가 달라 _simulate_heights와 값이 똑같지는 않다)
+
+    return: (만나이 (n, months_ahead + 1),
+             {"mean_height", "p5", "p50", "p95": (n, months_ahead + 1),
+              "prob_over": (n, months_ahead + 1, 사이즈 수) - size_table 각 사이즈 상한을 넘을 확률})
+    """
+    age = np.asarray(base_age)[:, None] + np.arange(months_ahead + 1)
+    L, M, S = lms_table.lookup(age, np.asarray(sex_code)[:, None])
+    h_max = size_table["height_max"].to_numpy(dtype=dtype)
+
+    n, months = age.shape
+    mean_height = np.empty((n, months))
+    quantiles = np.empty((n, months, 3))
+    prob_over = np.empty((n, months, len(h_max)))
+
+    z = rng.standard_normal((n, n_samples), dtype=dtype)
+    z *= np.sqrt(np.asarray(theta_var, dtype=dtype))[:, None]
+    z += np.asarray(theta_mean, dtype=dtype)[:, None]
+    for m in range(months):
+        if m > 0:
+            z += process_std * rng.standard_normal((n, n_samples), dtype=dtype)
+        heights = z_to_height(z, L[:, m, None], M[:, m, None], S[:, m, None])
+        mean_height[:, m] = heights.mean(axis=1)
+        quantiles[:, m] = np.percentile(heights, [5, 50, 95], axis=1).T
+        prob_over[:, m] = (heights[:, :, None] > h_max).mean(axis=1)
+
+    return age, {
+        "mean_height": mean_height,
+        "p5": quantiles[:, :, 0],
+        "p50": quantiles[:, :, 1],
+        "p95": quantiles[:, :, 2],
+        "prob_over": prob_over,
+    }
+
+
 def simulate_growth_trajectory(child_model, months_ahead=24,
                                n_samples=2000,
-                               process_std=0.1):
+                               process_std=0.1,
+                               seed=None, dtype=np.float64,
+                               summary=False):
     """
     앞으로 months_ahead 개월까지, 매달 키 분포를
     몬테카를로로 시뮬레이션.
     
     process_std: 월별 개인 z 위치의 랜덤 워크 강도 (성장 패턴 변동성)
+    seed: 정수 또는 np.random.Generator. 같은 seed면 같은 결과
+    dtype: np.float32로 주면 샘플 메모리가 절반
+    summary: True면 샘플을 남기지 않고 월별 요약 DataFrame만 반환
+      (summarize_trajectory_sim 컬럼 + 사이즈별 prob_over_<size_code>)
     """
-    theta_mean, theta_var = child_model.get_theta_posterior()
-    theta_samples = norm.rvs(loc=theta_mean, scale=np.sqrt(theta_var), size=n_samples)
-    
     if len(child_model.history) == 0:
         raise ValueError("Child model has no observations")
     last_date = max(h["date"] for h in child_model.history)
     
-    results = []
+    theta_mean, theta_var = child_model.get_theta_posterior()
+    rng = np.random.default_rng(seed)
+    args = (
+        rng, [theta_mean], [theta_var], [child_model.sex_code],
+        [child_model._age_in_months(last_date)],
+        months_ahead, n_samples, process_std, dtype,
+    )
     
-    for m in range(months_ahead + 1):
-        target_date = last_date + pd.DateOffset(months=m)
-        age_month = child_model._age_in_months(target_date)
-        L, M, S = get_lms(age_month, child_model.sex_code)
-        
-        # 월이 진행될 때마다 z 위치에 process noise 추가
-        if m > 0:
-            theta_samples = norm.rvs(loc=theta_samples, scale=process_std, size=n_samples)
-        
-        z_samples = theta_samples
-        height_samples = z_to_height(z_samples, L, M, S)
-        
-        results.append({
-            "month_ahead": m,
-            "date": target_date,
-            "age_month": age_month,
-            "height_samples": height_samples
+    if summary:
+        ages, stats = _stream_summaries(*args)
+        summary_df = pd.DataFrame({
+            "month_ahead": np.arange(months_ahead + 1),
+            "date": [last_date + pd.DateOffset(months=m) for m in range(months_ahead + 1)],
+            "age_month": ages[0],
+            **{key: stats[key][0] for key in ["mean_height", "p5", "p50", "p95"]},
         })
+        for i, code in enumerate(size_table["size_code"]):
+            summary_df[f"prob_over_{code}"] = stats["prob_over"][0, :, i]
+        return summary_df
     
-    return results
+    ages, heights = _simulate_heights(*args)
+    return [
+        {
+            "month_ahead": m,
+            "date": last_date + pd.DateOffset(months=m),
+            "age_month": int(ages[0, m]),
+            "height_samples": heights[0, :, m]
+        }
+        for m in range(months_ahead + 1)
+    ]
+
+
+def simulate_cohort_trajectories(cohort, index=None, months_ahead=24,
+                                 n_samples=2000, process_std=0.1,
+                                 seed=None, dtype=np.float64,
+                                 summary=False):
+    """
+    CohortGrowthModel의 여러 아이(index, 기본: 전체)를 한 번에 시뮬레이션.
+    각 아이의 마지막 관측일부터 months_ahead 개월까지.
+
+    return: (만나이 (n, months_ahead + 1), 키 샘플 (n, n_samples, months_ahead + 1))
+      summary=True면 키 샘플 대신 _stream_summaries의 요약 dict (아이당 O(개월) 메모리)
+    """
+    index = np.arange(len(cohort)) if index is None else np.asarray(index)
+    last_date = cohort.last_date[index]
+    unobserved = np.isnat(last_date)
+    if np.any(unobserved):
+        raise ValueError(f"Children with no observations: {[cohort.keys[i] for i in index[unobserved][:10]]}")
+    
+    rng = np.random.default_rng(seed)
+    simulate = _stream_summaries if summary else _simulate_heights
+    return simulate(
+        rng, cohort.theta_mean[index], cohort.theta_var[index], cohort.sex_code[index],
+        cohort.age_in_months(last_date, index),
+        months_ahead, n_samples, process_std, dtype,
+    )
 
 
 def summarize_trajectory_sim(results):
@@ -316,9 +644,7 @@ def summarize_trajectory_sim(results):
             "date": r["date"],
             "age_month": r["age_month"],
             "mean_height": np.mean(hs),
-            "p5": np.percentile(hs, 5),
-            "p50": np.percentile(hs, 50),
-            "p95": np.percentile(hs, 95),
+            **dict(zip(["p5", "p50", "p95"], np.percentile(hs, [5, 50, 95]))),
         })
     return pd.DataFrame(summary)
 
@@ -328,6 +654,8 @@ def size_change_probability(results, current_size_code):
     현재 사이즈(current_size_code)를 기준으로,
     각 month_ahead에서 '현재 사이즈 상한을 넘는 비율' 계산
     → 이걸 알림/threshold 로직에 활용 가능.
+
+    results: simulate_growth_trajectory 결과 (샘플 리스트 또는 summary=True의 DataFrame)
     """
     row = size_table[size_table["size_code"] == current_size_code]
     if row.empty:
@@ -335,6 +663,14 @@ def size_change_probability(results, current_size_code):
     row = row.iloc[0]
     h_max = row["height_max"]
     
+    if isinstance(results, pd.DataFrame):
+        # 요약 모드: 시뮬레이션하면서 이미 계산해 둔 값
+        return pd.DataFrame({
+            "month_ahead": results["month_ahead"],
+            "date": results["date"],
+            "prob_over_current_size": results[f"prob_over_{current_size_code}"],
+        })
+    
     probs = []
     for r in results:
         hs = r["height_samples"]
@@ -351,76 +687,79 @@ def size_change_probability(results, current_size_code):
 # 6. 예시: 주어진 JSON 구조로부터 전체 파이프라인 테스트
 # ============================================
 
-# DB에서 읽어온 유저 레코드 예시 (질문에서 준 구조)
-user_record_example = {
-    "nickname": "MovingJu",
-    "pw": "uhaha",
-    "profile_photo": "",
-    "bio": "Halo",
-    "location": { # Corrected typo from "locatioin"
-        "si": "용인시",
-        "gu": "기흥구"
-    },
-    "baby": [
-        {
-            "birth": "2022-11-22",
-            "height": 50, # Realistic height for newborn
-            "weight": 3.5, # Realistic weight for newborn
-            "sex": 4,  # 여아로 매핑될 것 (2)
-            "tags": ["활동성", "잠옷용"]
+if __name__ == "__main__":
+    # DB에서 읽어온 유저 레코드 예시 (질문에서 준 구조)
+    user_record_example = {
+        "nickname": "MovingJu",
+        "pw": "uhaha",
+        "profile_photo": "",
+        "bio": "Halo",
+        "location": { # Corrected typo from "locatioin"
+            "si": "용인시",
+            "gu": "기흥구"
         },
-        {
-            "birth": "2022-01-28",
-            "height": 87, # Realistic height for ~22-month-old
-            "weight": 12,
-            "sex": 4,  # 여아
-            "tags": ["공주님", "파티/특별한 날"]
-        }
-    ],
-    "clothes": [
-        {
-            "title": "super big shirt",
-            "picture": "",
-            "price": 9999,
-            "size": 85,
-            "content": "즐~~~~ 예쁘게 입어라~~",
-            "tags": ["모던", "클래식"]
-        },
-        {
-            "title": "겁내 이쁜 옷",
-            "picture": "",
-            "price": 99999,
-            "size": 50,
-            "content": "사실 안예뻐여",
-            "tags": ["겨울용", "레이어링 가능"]
-        }
-    ],
-    "writings": [1, 2]
-}
-
-# 여러 유저가 있다고 가정하면 리스트로 묶어서 전달
-user_records = [user_record_example]
-
-# 특정 기준일에 키가 측정되었다고 가정 (질문 시점 기준)
-measurement_date = "2025-11-23"
-growth_models = build_growth_models_from_users(user_records, measurement_date=measurement_date)
-
-# MovingJu 의 첫 번째 아이 모델 가져오기
-movingju_models = growth_models["MovingJu"]
-print("MovingJu 아이 수:", len(movingju_models))
-for idx, m in enumerate(movingju_models):
-    print(f"baby index {idx} -> theta_mean={m.theta_mean:.3f}, theta_var={m.theta_var:.3f}")
-
-# 예시: 2026-06-01 기준으로 첫 번째 아이의 추천 사이즈
-if len(movingju_models) > 0:
-    child0 = movingju_models[0]
-    best_size, prob_df, height_samples = recommend_size(child0, "2026-06-01")
-    print("\n[사이즈 추천 결과]")
-    print("추천 사이즈:", best_size)
-    print(prob_df)
-
-    plt.hist(height_samples, bins=40, density=True, alpha=0.6)
-    plt.title("Predicted height distribution (2026-06-01)")
-    plt.xlabel("Height (cm)")
-    plt.ylabel("Density")
-    plt.show()
+        "baby": [
+            {
+                "birth": "2022-11-22",
+                "height": 50, # Realistic height for newborn
+                "weight": 3.5, # Realistic weight for newborn
+                "sex": 4,  # 여아로 매핑될 것 (2)
+                "tags": ["활동성", "잠옷용"]
+            },
+            {
+                "birth": "2022-01-28",
+                "height": 87, # Realistic height for ~22-month-old
+                "weight": 12,
+                "sex": 4,  # 여아
+                "tags": ["공주님", "파티/특별한 날"]
+            }
+        ],
+        "clothes": [
+            {
+                "title": "super big shirt",
+                "picture": "",
+                "price": 9999,
+                "size": 85,
+                "content": "즐~~~~ 예쁘게 입어라~~",
+                "tags": ["모던", "클래식"]
+            },
+            {
+                "title": "겁내 이쁜 옷",
+                "picture": "",
+                "price": 99999,
+                "size": 50,
+                "content": "사실 안예뻐여",
+                "tags": ["겨울용", "레이어링 가능"]
+            }
+        ],
+        "writings": [1, 2]
+    }
+
+    # 여러 유저가 있다고 가정하면 리스트로 묶어서 전달
+    user_records = [user_record_example]
+
+    # 특정 기준일에 키가 측정되었다고 가정 (질문 시점 기준)
+    measurement_date = "2025-11-23"
+    growth_models = build_growth_models_from_users(user_records, measurement_date=measurement_date)
+
+    # MovingJu 의 첫 번째 아이 모델 가져오기
+    movingju_models = growth_models["MovingJu"]
+    print("MovingJu 아이 수:", len(movingju_models))
+    for idx, m in enumerate(movingju_models):
+        print(f"baby index {idx} -> theta_mean={m.theta_mean:.3f}, theta_var={m.theta_var:.3f}")
+
+    # 예시: 2026-06-01 기준으로 첫 번째 아이의 추천 사이즈
+    if len(movingju_models) > 0:
+        child0 = movingju_models[0]
+        best_size, prob_df, height_samples = recommend_size(child0, "2026-06-01")
+        # 분포 그림용 샘플은 몬테카를로로
+        _, _, height_samples = recommend_size(child0, "2026-06-01", method="mc")
+        print("\n[사이즈 추천 결과]")
+        print("추천 사이즈:", best_size)
+        print(prob_df)
+
+        plt.hist(height_samples, bins=40, density=True, alpha=0.6)
+        plt.title("Predicted height distribution (2026-06-01)")
+        plt.xlabel("Height (cm)")
+        plt.ylabel("Density")
+        plt.show()
@@ -11,4 +11,8 @@ reload(){
 docker-run(){
     docker compose build
     docker compose up
-}
\ No newline at end of file
+}
+
+migrate(){
+    uv run src/manage.py migrate
+}
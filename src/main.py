@@ -1,9 +1,26 @@
+from contextlib import asynccontextmanager
+import asyncio
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
+import modules
 import routes
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await modules.connect()
+    # 조회용 인덱스 (이미 있으면 그대로)
+    await modules.ensure_indexes()
+    if modules.WRITE_BEHIND:
+        modules.profile_writes.start()
+    revoked_sync = asyncio.create_task(modules.session.sync_revoked())
+    yield
+    revoked_sync.cancel()
+    # 모아 둔 프로필 변경을 다 쓰고 나서 연결 종료
+    await modules.profile_writes.stop()
+    modules.close()
+
+app = FastAPI(lifespan=lifespan)
 
 # CORS 미들웨어 추가
 app.add_middleware(
@@ -18,6 +35,8 @@ app.include_router(routes.chat.router)
 app.include_router(routes.sign.router)
 app.include_router(routes.user.router)
 app.include_router(routes.board.router)
+app.include_router(routes.jjim.router)
+app.include_router(routes.health.router)
 
 @app.get("/")
 async def read_root():
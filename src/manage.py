@@ -0,0 +1,105 @@
+"""
+DB 관리용 스크립트.
+
+사용법 (프로젝트 루트에서):
+    uv run src/manage.py migrate
+    uv run src/manage.py indexes
+    uv run src/manage.py reconcile
+    uv run src/manage.py reindex
+    uv run src/manage.py sellers
+"""
+import asyncio
+import sys
+
+import modules
+
+# (예전 컬렉션, 배열 key, 새 레코드 단위 컬렉션)
+BLOB_LAYOUT = [
+    ("user", "data", "users"),
+    ("board", "writings", "writings"),
+    ("board", "boards", "boards"),
+    ("chat", "data", "chats"),
+]
+
+
+async def migrate():
+    """
+    통배열 레이아웃 -> 레코드 단위 컬렉션 1회 마이그레이션
+    """
+    for blob_collection, key, collection in BLOB_LAYOUT:
+        count = await modules.migrate(blob_collection, key, collection)
+        print(f"{blob_collection}.{key} -> {collection}: {count} records")
+
+    # 채팅방에 사용자 쌍 key 부여 (같은 쌍의 방은 하나로 합침)
+    print(f"chat rooms rekeyed: {await modules.chat.rekey_rooms()}")
+    print(f"chat inbox rebuilt from {await modules.chat.rebuild_inbox()} rooms")
+
+    # 게시글 id 시퀀스를 기존 최대 id 다음부터 시작하도록 맞춘다
+    last: list[dict] = await modules.find("writings", {}, {"id": 1}, sort=[("id", -1)], limit=1)
+    if last:
+        await modules.seed_id("writings", last[0]["id"] + 1)
+
+    await indexes()
+    await reconcile()
+    await reindex()
+    await sellers()
+
+
+async def reconcile():
+    """
+    게시글 좋아요/댓글 카운터를 실제 배열 길이로 일괄 재계산
+    """
+    count = await modules.modify_many("writings", {}, [{"$set": {
+        "liked_count": {"$size": {"$ifNull": ["$liked", []]}},
+        "comment_count": {"$size": {"$ifNull": ["$comment", []]}},
+    }}])
+    print(f"writings counters fixed: {count}")
+
+
+async def reindex():
+    """
+    게시글 검색용 역색인 전체 재생성
+    """
+    writings = await modules.find("writings", {}, {"id": 1, "board": 1, "title": 1, "content": 1})
+    count = await modules.search.reindex(writings)
+    print(f"search index rebuilt: {count} writings")
+
+
+async def sellers():
+    """
+    판매자 목록 뷰 전체 재생성
+    """
+    count = await modules.rebuild_sellers()
+    print(f"sellers view rebuilt from {count} users")
+
+
+async def indexes():
+    """
+    조회용 인덱스 생성
+    """
+    for name in await modules.ensure_indexes():
+        print(f"index: {name}")
+
+
+async def run(command):
+    await modules.connect()
+    try:
+        await command()
+    finally:
+        modules.close()
+
+
+COMMANDS = {
+    "migrate": migrate,
+    "indexes": indexes,
+    "reconcile": reconcile,
+    "reindex": reindex,
+    "sellers": sellers,
+}
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else ""
+    if command not in COMMANDS:
+        print(f"usage: manage.py [{'|'.join(COMMANDS)}]")
+        sys.exit(1)
+    asyncio.run(run(COMMANDS[command]))
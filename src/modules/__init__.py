@@ -1,2 +1,16 @@
 from .schema import Writing
-from .fetch import read, write
\ No newline at end of file
+from .fetch import connect, close, ping, pool_stats
+from .fetch import read, write, find_one, find, insert_one, insert_many, update_one, push, migrate
+from .fetch import delete_many, bulk_modify
+from .fetch import ConflictError, DuplicateKeyError, modify, modify_and_get, modify_many, next_id, seed_id, update_versioned, ensure_indexes
+from .cache import cache
+from .sellers import SELLER_FIELDS, refresh_seller, rebuild_sellers, seller_query
+from .password import hash_password, verify_password
+from .session import current_user
+from . import session
+from .hub import hub
+from .writebehind import WRITE_BEHIND, WriteBehind, profile_writes
+from .paging import MAX_LIMIT, CursorError, encode_cursor, decode_cursor, paginate
+
+from . import search
+from . import chat
@@ -0,0 +1,109 @@
+from collections import OrderedDict
+import asyncio
+import os
+import time
+
+CACHE_SIZE = int(os.getenv("CACHE_SIZE") or 4096)
+CACHE_TTL = float(os.getenv("CACHE_TTL") or 10)
+
+
+class _LoaderCancelled(Exception):
+    """
+    같은 key를 조회하던 요청이 취소됐을 때 기다리던 요청들에게 전달
+    """
+
+
+class RecordCache:
+    """
+    (collection, key) 단위 읽기 캐시. LRU + TTL.
+
+    - 같은 key를 동시에 놓치면(miss) DB 조회는 한 번만 하고 나머지는 그 결과를 기다린다.
+    - 쓰기가 일어나면 invalidate로 지운다. 다른 워커의 쓰기는 TTL 안에 반영된다.
+    - 반환값은 캐시와 같은 객체이므로 호출한 쪽에서 수정하면 안 된다.
+    """
+    def __init__(self, maxsize: int = CACHE_SIZE, ttl: float = CACHE_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self._entries: OrderedDict[tuple[str, str], tuple[float, object]] = OrderedDict()
+        self._pending: dict[tuple[str, str], asyncio.Future] = {}
+        # invalidate 이후에 끝난 (이전) 조회 결과가 캐시에 들어가지 않도록 세대 번호를 둔다
+        self._generation: dict[str, int] = {}
+
+    async def get(self, collection: str, key: str, loader):
+        """
+        캐시에 있으면 바로 반환, 없으면 await loader() 결과를 저장하고 반환.
+        """
+        entry_key = (collection, key)
+        entry = self._entries.get(entry_key)
+        if entry and entry[0] > time.monotonic():
+            self.hits += 1
+            self._entries.move_to_end(entry_key)
+            return entry[1]
+        self.misses += 1
+
+        pending = self._pending.get(entry_key)
+        while pending:
+            self.coalesced += 1
+            try:
+                return await asyncio.shield(pending)
+            except _LoaderCancelled:
+                # 먼저 조회하던 요청이 취소됨. 다른 대기자가 조회를 넘겨받았으면 그걸 기다리고,
+                # 아니면 직접 조회한다
+                pending = self._pending.get(entry_key)
+
+        future = asyncio.get_running_loop().create_future()
+        self._pending[entry_key] = future
+        generation = self._generation.get(collection, 0)
+        try:
+            value = await loader()
+        except asyncio.CancelledError:
+            # 공유 future를 cancel하면 기다리던 다른 요청까지 취소되므로 다시 시도하라고만 알린다
+            future.set_exception(_LoaderCancelled())
+            future.exception()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # 기다리는 쪽이 없어도 "exception never retrieved" 경고가 나지 않게 소비
+            future.exception()
+            raise
+        finally:
+            if self._pending.get(entry_key) is future:
+                del self._pending[entry_key]
+
+        future.set_result(value)
+        if self._generation.get(collection, 0) == generation:
+            self._entries[entry_key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(entry_key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return value
+
+    def invalidate(self, collection: str, key: str | None = None) -> None:
+        """
+        key가 없으면 collection 전체를 지운다.
+        """
+        self._generation[collection] = self._generation.get(collection, 0) + 1
+        if key is not None:
+            self._entries.pop((collection, key), None)
+            self._pending.pop((collection, key), None)
+            return
+        for entry_key in [k for k in self._entries if k[0] == collection]:
+            del self._entries[entry_key]
+        for entry_key in [k for k in self._pending if k[0] == collection]:
+            del self._pending[entry_key]
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "hit_ratio": self.hits / total if total else 0.0,
+        }
+
+
+cache = RecordCache()
@@ -0,0 +1,191 @@
+import asyncio
+import json
+import os
+import time
+
+from datetime import datetime, timezone
+
+from .fetch import bulk_modify, delete_many, find, find_one, modify, modify_and_get
+
+ROOMS = "chats"            # {key, users, count, inline, log}
+BUCKETS = "chat_buckets"   # {key, b, log: [{..., seq}]}
+INBOX = "inbox"            # 사용자별 방 요약 {owner, with, key, last_message, unread, updated}
+
+# 0이면 메시지를 방 도큐먼트의 log에 전부 저장.
+# N이면 방에는 개수만 두고 메시지는 N개씩 chat_buckets에 나눠 저장 (긴 대화방용)
+# 한 번 켠 뒤에 다시 0으로 되돌리면 안 된다.
+CHAT_BUCKET_SIZE = int(os.getenv("CHAT_BUCKET_SIZE") or 0)
+# 버킷 모드에서 seq 개수 증가와 메시지 추가는 따로 쓰이므로, 중간 seq가 아직 안 보일 수 있다.
+# 읽을 때는 빈 seq 앞까지만 돌려주고, 빈 칸 뒤 메시지가 이 시간(초)보다 오래됐으면
+# (보내다가 죽은 경우) 빈 칸을 건너뛴다.
+CHAT_GAP_WAIT = float(os.getenv("CHAT_GAP_WAIT") or 10)
+
+# $slice 범위 끝으로 쓰는 충분히 큰 수
+_ALL = 2 ** 31 - 1
+
+
+def room_key(a: str, b: str) -> str:
+    """
+    두 사용자 쌍의 정규화된 방 key (순서 무관)
+    """
+    return json.dumps(sorted([a, b]), ensure_ascii=False)
+
+
+async def append_message(sender: str, receiver: str, message: dict) -> int:
+    """
+    방이 없으면 만들고 메시지를 원자적으로 추가. 메시지의 seq(방 안 순번, 0부터) 반환.
+    방 수나 메시지 수와 상관없이 key 인덱스로 도큐먼트 하나(버킷이면 둘)만 건드린다.
+    """
+    key = room_key(sender, receiver)
+    on_insert = {"users": [sender, receiver]}
+    if not CHAT_BUCKET_SIZE:
+        room = await modify_and_get(ROOMS, {"key": key}, {
+            "$push": {"log": message},
+            "$inc": {"count": 1, "inline": 1},
+            "$setOnInsert": on_insert,
+        }, {"count": 1}, upsert=True)
+        return room["count"] - 1
+
+    room = await modify_and_get(ROOMS, {"key": key}, {
+        "$inc": {"count": 1},
+        "$setOnInsert": {**on_insert, "inline": 0},
+    }, {"count": 1}, upsert=True)
+    seq = room["count"] - 1
+    await modify(BUCKETS, {"key": key, "b": seq // CHAT_BUCKET_SIZE}, {
+        "$push": {"log": {**message, "seq": seq, "ts": time.time()}},
+    }, upsert=True)
+    return seq
+
+
+async def read_messages(key: str, after: int = -1, last_n: int | None = None) -> tuple[list[dict], int]:
+    """
+    seq가 after보다 큰 메시지들. last_n이 있으면 그중 마지막 n개만.
+    return: (seq가 붙은 메시지 목록, 방의 전체 메시지 수)
+    """
+    room = await find_one(ROOMS, {"key": key}, {"count": 1, "inline": 1})
+    if not room:
+        return [], 0
+    count = room.get("count", 0)
+    inline = room.get("inline", count)
+    # 음수 $slice는 뒤에서부터 세므로 0보다 앞은 잘라 낸다
+    start = max(after + 1, 0)
+    if last_n is not None:
+        start = max(start, count - last_n)
+    if start >= count:
+        return [], count
+
+    messages: list[dict] = []
+    # 방 도큐먼트 안의 메시지는 배열 위치가 곧 seq
+    if start < inline:
+        document = await find_one(ROOMS, {"key": key}, {"log": {"$slice": [start, _ALL]}})
+        messages = [{**message, "seq": start + i} for i, message in enumerate(document.get("log", []))]
+    # 버킷에 나눠 저장된 메시지
+    if count > inline and CHAT_BUCKET_SIZE:
+        first = max(start, inline)
+        buckets = await find(BUCKETS, {"key": key, "b": {"$gte": first // CHAT_BUCKET_SIZE}}, {"log": 1})
+        bucketed = [message for bucket in buckets for message in bucket.get("log", []) if message["seq"] >= first]
+        expected = first
+        for message in sorted(bucketed, key=lambda message: message["seq"]):
+            # 앞 seq가 아직 쓰이는 중이면 거기서 멈춘다 (cursor가 빈 seq를 건너뛰지 않도록)
+            if message["seq"] != expected and time.time() - message.get("ts", 0) < CHAT_GAP_WAIT:
+                break
+            messages.append({field: value for field, value in message.items() if field != "ts"})
+            expected = message["seq"] + 1
+    return messages, count
+
+
+async def rooms_of(nickname: str) -> list[dict]:
+    """
+    nickname이 참여한 방들의 key, users (메시지 제외)
+    """
+    return await find(ROOMS, {"users": nickname}, {"key": 1, "users": 1})
+
+
+def partner(room: dict, nickname: str) -> str:
+    others = [user for user in room.get("users", []) if user != nickname]
+    return others[0] if others else nickname
+
+
+async def update_inbox(sender: str, receiver: str, message: dict) -> None:
+    """
+    메시지 전송 후 양쪽 방 요약 갱신. 받는 사람만 unread가 올라간다.
+    """
+    key = room_key(sender, receiver)
+    fields = {"key": key, "last_message": message, "updated": datetime.now(timezone.utc)}
+    operations = [({"owner": receiver, "with": sender}, {"$set": fields, "$inc": {"unread": 1}})]
+    if sender != receiver:
+        operations.append(({"owner": sender, "with": receiver}, {"$set": fields, "$setOnInsert": {"unread": 0}}))
+    await bulk_modify(INBOX, operations, upsert=True)
+
+
+async def inbox_of(nickname: str) -> list[dict]:
+    """
+    최근 메시지 순 방 목록. (owner, updated) 인덱스 한 번으로 읽는다.
+    """
+    return await find(INBOX, {"owner": nickname}, {"with": 1, "last_message": 1, "unread": 1},
+                      sort=[("updated", -1)])
+
+
+async def mark_read(nickname: str, partners: list[str]) -> None:
+    if partners:
+        await bulk_modify(INBOX, [
+            ({"owner": nickname, "with": other, "unread": {"$gt": 0}}, {"$set": {"unread": 0}})
+            for other in partners
+        ])
+
+
+async def rebuild_inbox() -> int:
+    """
+    모든 방에서 방 요약을 다시 만든다. (unread는 0으로)
+    """
+    rooms = await find(ROOMS, {"key": {"$exists": True}}, {"key": 1, "users": 1})
+    lasts = await asyncio.gather(*[read_messages(room["key"], last_n=1) for room in rooms])
+    await delete_many(INBOX, {})
+    operations = []
+    for room, (last, _) in zip(rooms, lasts):
+        if not last:
+            continue
+        message = {field: value for field, value in last[-1].items() if field != "seq"}
+        for owner in set(room["users"]):
+            operations.append(({"owner": owner, "with": partner(room, owner)}, {"$set": {
+                "key": room["key"],
+                "last_message": message,
+                "unread": 0,
+                "updated": datetime.now(timezone.utc),
+            }}))
+    await bulk_modify(INBOX, operations, upsert=True)
+    return len(rooms)
+
+
+async def rekey_rooms() -> int:
+    """
+    key가 없는 예전 방 도큐먼트에 key/count/inline을 채운다.
+    같은 사용자 쌍의 방이 여러 개면 log를 합쳐 하나로 만든다.
+    """
+    rooms = await find(ROOMS, {"key": {"$exists": False}}, {"users": 1, "log": 1})
+    merged: dict[str, dict] = {}
+    for room in rooms:
+        users = room.get("users") or []
+        if len(users) != 2:
+            continue
+        key = room_key(*users)
+        target = merged.setdefault(key, {"users": users, "log": []})
+        target["log"] += room.get("log") or []
+
+    for key, room in merged.items():
+        existing = await find_one(ROOMS, {"key": key}, {"count": 1})
+        if existing:
+            # 이미 새 방식 방이 있으면 예전 메시지를 앞에 붙인다 (서버를 띄우기 전에 실행할 것)
+            await modify(ROOMS, {"key": key}, {
+                "$push": {"log": {"$each": room["log"], "$position": 0}},
+                "$inc": {"count": len(room["log"]), "inline": len(room["log"])},
+            })
+        else:
+            await modify(ROOMS, {"key": key}, {"$set": {
+                "users": room["users"],
+                "log": room["log"],
+                "count": len(room["log"]),
+                "inline": len(room["log"]),
+            }}, upsert=True)
+        await delete_many(ROOMS, {"users": {"$all": room["users"], "$size": 2}, "key": {"$exists": False}})
+    return len(merged)
@@ -1,15 +1,123 @@
-from motor.motor_asyncio import AsyncIOMotorClient
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
+from pymongo import ASCENDING, DESCENDING, ReturnDocument, UpdateOne
+from pymongo.errors import DuplicateKeyError, OperationFailure
+from pymongo.monitoring import ConnectionPoolListener
 from dotenv import load_dotenv
+import asyncio
+import json
 import os
+import time
+
+from .cache import cache
 
 load_dotenv()
 HOST = os.getenv("HOST")
 PORT = os.getenv("PORT")
 DB_NAME = os.getenv("DB_NAME") or ""
-client = AsyncIOMotorClient(f"mongodb://{HOST}:{PORT}")
-db = client[DB_NAME]
+
+# 커넥션 풀 설정
+MONGO_MAX_POOL = int(os.getenv("MONGO_MAX_POOL") or 100)
+MONGO_MIN_POOL = int(os.getenv("MONGO_MIN_POOL") or 10)
+MONGO_TIMEOUT_MS = int(os.getenv("MONGO_TIMEOUT_MS") or 5000)
+# zstd, snappy는 추가 패키지가 필요하므로 기본은 zlib
+MONGO_COMPRESSORS = os.getenv("MONGO_COMPRESSORS") or "zlib"
+
+client: AsyncIOMotorClient | None = None
+db: AsyncIOMotorDatabase = None  # connect() 전에는 None
+
+
+class PoolStats(ConnectionPoolListener):
+    """
+    커넥션 풀 이벤트를 세어서 사용량을 보여준다.
+    """
+    def __init__(self):
+        self.open = 0       # 열려 있는 커넥션
+        self.in_use = 0     # 요청이 빌려간 커넥션
+        self.waiting = 0    # 커넥션을 기다리는 요청
+        self.failed = 0     # 커넥션을 못 받은 횟수 (대기 시간 초과 등)
+
+    def pool_created(self, event): pass
+    def pool_ready(self, event): pass
+    def pool_cleared(self, event): pass
+    def pool_closed(self, event): pass
+    def connection_ready(self, event): pass
+
+    def connection_created(self, event):
+        self.open += 1
+
+    def connection_closed(self, event):
+        self.open -= 1
+
+    def connection_check_out_started(self, event):
+        self.waiting += 1
+
+    def connection_check_out_failed(self, event):
+        self.waiting -= 1
+        self.failed += 1
+
+    def connection_checked_out(self, event):
+        self.waiting -= 1
+        self.in_use += 1
+
+    def connection_checked_in(self, event):
+        self.in_use -= 1
+
+    def snapshot(self) -> dict:
+        return {
+            "max": MONGO_MAX_POOL,
+            "open": self.open,
+            "in_use": self.in_use,
+            "waiting": self.waiting,
+            "failed": self.failed,
+        }
+
+
+pool_stats = PoolStats()
+
+
+async def connect() -> None:
+    """
+    Mongo 클라이언트 생성 후 min pool 만큼 커넥션을 미리 열어 둔다.
+    FastAPI lifespan(또는 manage.py)에서 한 번 호출.
+    """
+    global client, db
+    client = AsyncIOMotorClient(
+        f"mongodb://{HOST}:{PORT}",
+        maxPoolSize=MONGO_MAX_POOL,
+        minPoolSize=MONGO_MIN_POOL,
+        serverSelectionTimeoutMS=MONGO_TIMEOUT_MS,
+        connectTimeoutMS=MONGO_TIMEOUT_MS,
+        waitQueueTimeoutMS=MONGO_TIMEOUT_MS,
+        compressors=MONGO_COMPRESSORS,
+        event_listeners=[pool_stats],
+    )
+    db = client[DB_NAME]
+    # 동시에 ping을 보내면 그 수만큼 커넥션이 열린다
+    await asyncio.gather(*[db.command("ping") for _ in range(MONGO_MIN_POOL)])
+
+
+def close() -> None:
+    global client, db
+    if client is not None:
+        client.close()
+    client = None
+    db = None
+
+
+async def ping() -> float:
+    """
+    DB 왕복 시간(ms)
+    """
+    start = time.perf_counter()
+    await db.command("ping")
+    return (time.perf_counter() - start) * 1000
+
 
 async def read(collection: str, key: str = "data") -> dict:
+    return await cache.get(collection, key, lambda: _read(collection, key))
+
+
+async def _read(collection: str, key: str) -> dict:
     coll_data = db[collection]
 
     query = {key: {"$exists": True}}
@@ -20,8 +128,8 @@ async def read(collection: str, key: str = "data") -> dict:
         return document
     else:
         return {}
-    
-    
+
+
 async def write(collection: str, data, key: str = "data") -> None:
     """
     key 필드 기준으로 도큐먼트 업데이트/삽입.
@@ -33,3 +141,277 @@ async def write(collection: str, data, key: str = "data") -> None:
     update = {"$set": {key: data}}
 
     await coll_data.update_one(query, update, upsert=True)
+    cache.invalidate(collection)
+
+
+# ==================================================
+# 레코드 단위 API
+# 유저/게시글/채팅방 하나가 도큐먼트 하나.
+# 요청당 I/O가 전체 데이터가 아니라 건드린 레코드 크기에 비례한다.
+#
+# 조회 결과는 (collection, 조회 조건) 단위로 캐시되고
+# 같은 collection에 쓰기가 일어나면 통째로 무효화된다.
+# 반환된 레코드는 캐시와 공유되므로 수정하지 말고 복사해서 쓸 것.
+# ==================================================
+
+def _cache_key(*args) -> str:
+    return json.dumps(args, sort_keys=True, ensure_ascii=False, default=str)
+
+
+def _projection(projection: dict | None) -> dict:
+    # ObjectId와 내부 버전(_v)은 응답에 나가지 않도록 기본으로 제외
+    if projection and any(projection.values()):
+        return {"_id": 0, **projection}
+    return {"_id": 0, "_v": 0, **(projection or {})}
+
+
+async def find_one(collection: str, query: dict, projection: dict | None = None) -> dict:
+    """
+    query에 맞는 레코드 하나. 없으면 빈 딕셔너리.
+    """
+    async def load():
+        document = await db[collection].find_one(query, _projection(projection))
+        return document or {}
+    return await cache.get(collection, _cache_key("find_one", query, projection), load)
+
+
+async def find(collection: str, query: dict, projection: dict | None = None,
+               sort: list[tuple[str, int]] | None = None, limit: int = 0) -> list[dict]:
+    """
+    query에 맞는 레코드 목록. limit=0 이면 전부.
+    """
+    async def load():
+        cursor = db[collection].find(query, _projection(projection))
+        if sort:
+            cursor = cursor.sort(sort)
+        if limit:
+            cursor = cursor.limit(limit)
+        return await cursor.to_list(length=None)
+    return await cache.get(collection, _cache_key("find", query, projection, sort, limit), load)
+
+
+async def insert_one(collection: str, document: dict) -> None:
+    # insert_one은 넘긴 dict에 _id를 채워 넣으므로 복사본을 쓴다
+    await db[collection].insert_one(dict(document))
+    cache.invalidate(collection)
+
+
+async def insert_many(collection: str, documents: list[dict]) -> None:
+    if not documents:
+        return
+    await db[collection].insert_many([dict(document) for document in documents], ordered=False)
+    cache.invalidate(collection)
+
+
+async def delete_many(collection: str, query: dict) -> int:
+    """
+    query에 맞는 레코드 삭제. 삭제된 개수 반환.
+    """
+    result = await db[collection].delete_many(query)
+    cache.invalidate(collection)
+    return result.deleted_count
+
+
+async def update_one(collection: str, query: dict, fields: dict) -> bool:
+    """
+    레코드 일부 필드만 $set. 매칭된 레코드가 없으면 False.
+    """
+    result = await db[collection].update_one(query, {"$set": fields})
+    cache.invalidate(collection)
+    return result.matched_count > 0
+
+
+async def push(collection: str, query: dict, field: str, value) -> bool:
+    """
+    레코드의 배열 필드에 값 하나 추가. 매칭된 레코드가 없으면 False.
+    """
+    return await modify(collection, query, {"$push": {field: value}})
+
+
+# ==================================================
+# 원자적 연산
+# 읽고-고치고-쓰기 대신 서버에서 한 번에 적용해서
+# 여러 워커가 동시에 써도 다른 쓰기를 덮어쓰지 않는다.
+# ==================================================
+
+class ConflictError(RuntimeError):
+    """
+    update_versioned가 재시도 횟수 안에 버전 충돌을 해결하지 못함
+    """
+
+
+async def modify(collection: str, query: dict, update: dict, upsert: bool = False) -> bool:
+    """
+    $inc, $push, $setOnInsert 같은 업데이트 연산자를 그대로 원자 적용.
+    매칭(또는 upsert로 생성)된 레코드가 없으면 False.
+    """
+    result = await db[collection].update_one(query, update, upsert=upsert)
+    cache.invalidate(collection)
+    return result.matched_count > 0 or result.upserted_id is not None
+
+
+async def modify_and_get(collection: str, query: dict, update: dict, projection: dict | None = None,
+                         upsert: bool = False) -> dict:
+    """
+    modify와 같지만 적용된 뒤의 레코드를 돌려준다. (없으면 빈 딕셔너리)
+    """
+    document = await db[collection].find_one_and_update(
+        query, update, _projection(projection),
+        upsert=upsert, return_document=ReturnDocument.AFTER,
+    )
+    cache.invalidate(collection)
+    return document or {}
+
+
+async def modify_many(collection: str, query: dict, update) -> int:
+    """
+    query에 맞는 레코드 전부에 update(연산자 또는 파이프라인) 적용. 수정된 개수 반환.
+    """
+    result = await db[collection].update_many(query, update)
+    cache.invalidate(collection)
+    return result.modified_count
+
+
+async def bulk_modify(collection: str, operations: list[tuple[dict, dict]], upsert: bool = False) -> None:
+    """
+    (query, update) 여러 개를 한 번의 왕복으로 적용.
+    """
+    if not operations:
+        return
+    await db[collection].bulk_write(
+        [UpdateOne(query, update, upsert=upsert) for query, update in operations],
+        ordered=False,
+    )
+    cache.invalidate(collection)
+
+
+async def next_id(name: str) -> int:
+    """
+    name 시퀀스의 다음 값. 0부터 시작하고 동시에 불러도 겹치지 않는다.
+    """
+    document = await db["counters"].find_one_and_update(
+        {"_id": name},
+        {"$inc": {"seq": 1}},
+        upsert=True,
+        return_document=ReturnDocument.AFTER,
+    )
+    return document["seq"] - 1
+
+
+async def seed_id(name: str, value: int) -> None:
+    """
+    name 시퀀스가 최소 value부터 나오도록 올린다. (이미 더 크면 그대로)
+    """
+    await db["counters"].update_one({"_id": name}, {"$max": {"seq": value}}, upsert=True)
+
+
+async def update_versioned(collection: str, query: dict, mutate, retries: int = 5) -> tuple[dict, bool]:
+    """
+    낙관적 동시성 제어로 레코드 갱신.
+    레코드를 읽어 mutate(record)로 $set할 필드를 계산하고,
+    그 사이 _v(버전)가 바뀌었으면 다시 읽어서 재시도한다.
+
+    mutate가 falsy를 반환하면 쓰지 않는다.
+    return: (읽은 레코드, 적용 여부). 레코드가 없으면 ({}, False)
+    """
+    for _ in range(retries):
+        document = await db[collection].find_one(query, {"_id": 0})
+        if not document:
+            return {}, False
+        fields = mutate(document)
+        if not fields:
+            return document, False
+
+        version = document.get("_v", 0)
+        # _v가 없는 예전 레코드는 버전 0으로 취급
+        guard = {"_v": version} if version else {"_v": {"$exists": False}}
+        result = await db[collection].update_one(
+            {**query, **guard},
+            {"$set": fields, "$inc": {"_v": 1}},
+        )
+        if result.matched_count:
+            cache.invalidate(collection)
+            return document, True
+    raise ConflictError(f"{collection} {query}: too many concurrent updates")
+
+
+async def migrate(blob_collection: str, key: str, collection: str) -> int:
+    """
+    예전 통배열 레이아웃(blob_collection 도큐먼트의 key 배열)을
+    collection의 레코드 단위 도큐먼트로 한 번만 옮긴다.
+    이미 옮긴 적이 있으면 아무것도 하지 않고 0 반환.
+    """
+    name = f"{blob_collection}.{key}"
+    if await db["migrations"].find_one({"name": name}):
+        return 0
+
+    document = await read(blob_collection, key)
+    items = document.get(key) or []
+    # 문자열 등 dict가 아닌 항목은 순서를 id로 보존해서 감싼다
+    records = [
+        item if isinstance(item, dict) else {"id": idx, "value": item}
+        for idx, item in enumerate(items)
+    ]
+    if records:
+        await db[collection].insert_many([dict(record) for record in records])
+        cache.invalidate(collection)
+
+    await db["migrations"].insert_one({"name": name, "count": len(records)})
+    return len(records)
+
+
+# ==================================================
+# 인덱스
+# (collection, 인덱스 키, 옵션)
+# ==================================================
+INDEXES = [
+    # 로그인/프로필 변경: nickname -> user, 닉네임 중복 가입 방지
+    ("users", [("nickname", ASCENDING)], {"unique": True}),
+    # 로그아웃된 세션. 만료 시각이 지나면 자동 삭제
+    ("revoked_sessions", [("sid", ASCENDING)], {"unique": True}),
+    ("revoked_sessions", [("expires", ASCENDING)], {"expireAfterSeconds": 0}),
+    # /board/content, /board/modify: id -> writing
+    ("writings", [("id", ASCENDING)], {"unique": True}),
+    # /board/info: board_name -> writings (id 순)
+    ("writings", [("board", ASCENDING), ("id", ASCENDING)], {}),
+    # /board/info?sort=date: 날짜순 키셋 페이지네이션
+    ("writings", [("board", ASCENDING), ("date", ASCENDING), ("id", ASCENDING)], {}),
+    # /board/: 게시판 목록 키셋 페이지네이션
+    ("boards", [("id", ASCENDING)], {}),
+    # /board/search: 토큰 -> posting (tf 높은 순), 게시판 필터
+    ("search_postings", [("t", ASCENDING), ("tf", DESCENDING)], {}),
+    ("search_postings", [("t", ASCENDING), ("b", ASCENDING), ("tf", DESCENDING)], {}),
+    # 게시글 재색인 시 기존 posting 제거
+    ("search_postings", [("id", ASCENDING)], {}),
+    ("search_terms", [("t", ASCENDING)], {"unique": True}),
+    # 채팅방: 사용자 쌍 key -> 방, 참여자 -> 방 목록
+    ("chats", [("key", ASCENDING)], {"unique": True, "partialFilterExpression": {"key": {"$exists": True}}}),
+    ("chats", [("users", ASCENDING)], {}),
+    ("chat_buckets", [("key", ASCENDING), ("b", ASCENDING)], {"unique": True}),
+    # /chat/chat/rooms: 사용자별 방 요약 (최근 순)
+    ("inbox", [("owner", ASCENDING), ("with", ASCENDING)], {"unique": True}),
+    ("inbox", [("owner", ASCENDING), ("updated", DESCENDING)], {}),
+    # /jjim: (사용자, 종류, 대상) -> 찜, 사용자별 최근 찜 순 목록
+    ("jjim", [("owner", ASCENDING), ("kind", ASCENDING), ("target", ASCENDING)], {"unique": True}),
+    ("jjim", [("owner", ASCENDING), ("kind", ASCENDING), ("id", ASCENDING)], {}),
+    # /user/get_sellers: 판매자 목록 뷰 (id = nickname 순 페이지네이션 + 필터)
+    ("sellers", [("id", ASCENDING)], {"unique": True}),
+    ("sellers", [("tags", ASCENDING), ("id", ASCENDING)], {}),
+    ("sellers", [("location.si", ASCENDING), ("location.gu", ASCENDING), ("id", ASCENDING)], {}),
+    ("sellers", [("products.size", ASCENDING)], {}),
+    ("sellers", [("products.price", ASCENDING)], {}),
+]
+
+
+async def ensure_indexes() -> list[str]:
+    """
+    INDEXES를 만든다. 이미 있으면 그대로 두므로 여러 번 불러도 된다.
+    """
+    names = []
+    for collection, keys, options in INDEXES:
+        try:
+            names.append(await db[collection].create_index(keys, **options))
+        except OperationFailure as e:
+            # 기존 데이터에 중복이 있으면 unique 인덱스를 못 만든다. 서버는 계속 띄운다
+            print(f"[WARN] index 생성 실패 - {collection} {keys}, err={e}")
+    return names
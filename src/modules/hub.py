@@ -0,0 +1,69 @@
+import asyncio
+import os
+
+# 연결 하나당 보내지 못하고 쌓아 둘 수 있는 이벤트 수
+HUB_QUEUE_SIZE = int(os.getenv("HUB_QUEUE_SIZE") or 100)
+
+
+class Subscription:
+    def __init__(self, nickname: str, maxsize: int):
+        self.nickname = nickname
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize)
+
+    async def get(self) -> dict | None:
+        """
+        다음 이벤트. None이면 너무 느려서 끊긴 것이므로 연결을 닫아야 한다.
+        """
+        return await self.queue.get()
+
+
+class Hub:
+    """
+    프로세스 내 pub/sub. nickname별로 연결된 WebSocket들에 이벤트를 뿌린다.
+
+    publish는 기다리지 않는다. 큐가 가득 찬 (느린) 연결은 구독을 끊고
+    None을 넣어 알린다. 클라이언트는 다시 연결해서 /chat/sync로 빠진 메시지를 받는다.
+    워커가 여러 개면 같은 워커에 붙은 연결에만 전달된다.
+    """
+    def __init__(self, queue_size: int = HUB_QUEUE_SIZE):
+        self.queue_size = queue_size
+        self.published = 0
+        self.slow_disconnects = 0
+        self._subscriptions: dict[str, set[Subscription]] = {}
+
+    def subscribe(self, nickname: str) -> Subscription:
+        subscription = Subscription(nickname, self.queue_size)
+        self._subscriptions.setdefault(nickname, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        subscriptions = self._subscriptions.get(subscription.nickname)
+        if not subscriptions:
+            return
+        subscriptions.discard(subscription)
+        if not subscriptions:
+            del self._subscriptions[subscription.nickname]
+
+    def publish(self, nickname: str, event: dict) -> None:
+        for subscription in list(self._subscriptions.get(nickname, ())):
+            try:
+                subscription.queue.put_nowait(event)
+            except asyncio.QueueFull:
+                self.slow_disconnects += 1
+                self.unsubscribe(subscription)
+                # 쌓인 이벤트는 버리고 종료 신호만 남긴다
+                while not subscription.queue.empty():
+                    subscription.queue.get_nowait()
+                subscription.queue.put_nowait(None)
+        self.published += 1
+
+    def stats(self) -> dict:
+        return {
+            "users": len(self._subscriptions),
+            "connections": sum(len(subscriptions) for subscriptions in self._subscriptions.values()),
+            "published": self.published,
+            "slow_disconnects": self.slow_disconnects,
+        }
+
+
+hub = Hub()
@@ -0,0 +1,79 @@
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import base64
+import functools
+import hashlib
+import hmac
+import os
+import secrets
+
+# scrypt 비용 파라미터. 메모리 사용량 = 128 * N * r 바이트 (기본 16MB)
+SCRYPT_N = int(os.getenv("SCRYPT_N") or 2 ** 14)
+SCRYPT_R = int(os.getenv("SCRYPT_R") or 8)
+SCRYPT_P = int(os.getenv("SCRYPT_P") or 1)
+# 해시 계산 스레드 수. 동시에 이 이상은 계산하지 않는다
+HASH_WORKERS = int(os.getenv("HASH_WORKERS") or min(4, os.cpu_count() or 1))
+
+PREFIX = "scrypt"
+SALT_BYTES = 16
+DIGEST_BYTES = 32
+
+# hashlib.scrypt는 계산 중 GIL을 놓으므로 스레드 풀에서 돌리면 이벤트 루프가 멈추지 않는다
+_executor = ThreadPoolExecutor(max_workers=HASH_WORKERS, thread_name_prefix="password")
+
+
+def _b64(raw: bytes) -> str:
+    return base64.b64encode(raw).decode()
+
+
+def _scrypt(pw: str, salt: bytes, n: int, r: int, p: int) -> bytes:
+    return hashlib.scrypt(
+        pw.encode(), salt=salt, n=n, r=r, p=p,
+        maxmem=256 * n * r + 1024 * 1024, dklen=DIGEST_BYTES,
+    )
+
+
+def hash_password_sync(pw: str) -> str:
+    """
+    "scrypt$N$r$p$salt$digest" 형식의 해시. 이벤트 루프 안에서는 hash_password를 쓸 것.
+    """
+    salt = os.urandom(SALT_BYTES)
+    digest = _scrypt(pw, salt, SCRYPT_N, SCRYPT_R, SCRYPT_P)
+    return f"{PREFIX}${SCRYPT_N}${SCRYPT_R}${SCRYPT_P}${_b64(salt)}${_b64(digest)}"
+
+
+@functools.cache
+def _dummy_hash() -> str:
+    return hash_password_sync(secrets.token_urlsafe(16))
+
+
+def verify_password_sync(pw: str, stored: str | None) -> tuple[bool, bool]:
+    """
+    return: (일치 여부, 다시 해시해서 저장해야 하는지)
+    평문으로 저장된 예전 비밀번호도 받아들이고, 맞으면 rehash 대상으로 알려 준다.
+    stored가 비어 있으면 (없는 유저, pw 필드 없음) 항상 실패.
+    이때도 같은 시간이 걸리도록 더미 해시로 검증을 한 번 한다.
+    """
+    if not stored or not isinstance(stored, str):
+        verify_password_sync(pw, _dummy_hash())
+        return False, False
+    if not stored.startswith(PREFIX + "$"):
+        ok = hmac.compare_digest(pw.encode(), stored.encode())
+        return ok, ok
+    try:
+        _, n, r, p, salt, digest = stored.split("$")
+        n, r, p = int(n), int(r), int(p)
+        salt, digest = base64.b64decode(salt), base64.b64decode(digest)
+    except ValueError:
+        return False, False
+    ok = hmac.compare_digest(_scrypt(pw, salt, n, r, p), digest)
+    # 비용 파라미터를 올렸으면 로그인 성공 시 새 파라미터로 바꿔 저장
+    return ok, ok and (n, r, p) != (SCRYPT_N, SCRYPT_R, SCRYPT_P)
+
+
+async def hash_password(pw: str) -> str:
+    return await asyncio.get_running_loop().run_in_executor(_executor, hash_password_sync, pw)
+
+
+async def verify_password(pw: str, stored: str | None) -> tuple[bool, bool]:
+    return await asyncio.get_running_loop().run_in_executor(_executor, verify_password_sync, pw, stored)
@@ -0,0 +1,124 @@
+from collections import Counter
+import asyncio
+import math
+import os
+import re
+import unicodedata
+
+from .fetch import bulk_modify, delete_many, find, find_one, insert_many, modify
+
+# BM25 파라미터
+K1 = 1.2
+B = 0.75
+# 제목에 나온 단어는 본문보다 이만큼 더 센다
+TITLE_WEIGHT = 2
+# 검색어 한 토큰당 읽어 올 posting 최대 개수 (tf 높은 순)
+# 아주 흔한 토큰은 idf가 작아서 잘라내도 순위에 거의 영향이 없다
+POSTINGS_LIMIT = int(os.getenv("SEARCH_POSTINGS_LIMIT") or 2000)
+
+POSTINGS = "search_postings"  # {t: 토큰, id: 게시글 id, b: 게시판, tf, dl}
+TERMS = "search_terms"        # {t: 토큰, df: 토큰이 나온 게시글 수}
+STATS = "search_stats"        # {_id: "writings", n: 게시글 수, total_dl: 전체 길이}
+
+_WORD = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> list[str]:
+    """
+    문자 bigram 토큰화. 형태소 분석 없이도 한국어 부분 일치가 된다.
+    ("아기옷" -> "아기", "기옷") 한 글자 단어는 그대로 토큰.
+    """
+    text = unicodedata.normalize("NFKC", text or "").lower()
+    tokens = []
+    for word in _WORD.findall(text):
+        if len(word) == 1:
+            tokens.append(word)
+        else:
+            tokens.extend(word[i:i + 2] for i in range(len(word) - 1))
+    return tokens
+
+
+def _term_counts(writing: dict) -> Counter:
+    counts = Counter(tokenize(writing.get("content", "")))
+    for token in tokenize(writing.get("title", "")):
+        counts[token] += TITLE_WEIGHT
+    return counts
+
+
+async def index_writing(writing: dict) -> None:
+    """
+    게시글 하나를 역색인에 반영. 이미 색인된 게시글이면 먼저 뺀다.
+    """
+    await unindex_writing(writing["id"])
+
+    counts = _term_counts(writing)
+    if not counts:
+        return
+    dl = sum(counts.values())
+    await insert_many(POSTINGS, [
+        {"t": token, "id": writing["id"], "b": writing.get("board"), "tf": tf, "dl": dl}
+        for token, tf in counts.items()
+    ])
+    await bulk_modify(TERMS, [({"t": token}, {"$inc": {"df": 1}}) for token in counts], upsert=True)
+    await modify(STATS, {"_id": "writings"}, {"$inc": {"n": 1, "total_dl": dl}}, upsert=True)
+
+
+async def unindex_writing(writing_id: int) -> None:
+    postings = await find(POSTINGS, {"id": writing_id}, {"t": 1, "dl": 1})
+    if not postings:
+        return
+    await delete_many(POSTINGS, {"id": writing_id})
+    await bulk_modify(TERMS, [({"t": posting["t"]}, {"$inc": {"df": -1}}) for posting in postings])
+    await modify(STATS, {"_id": "writings"}, {"$inc": {"n": -1, "total_dl": -postings[0]["dl"]}})
+
+
+async def search(query: str, board: str | None = None,
+                 offset: int = 0, limit: int = 20) -> tuple[list[tuple[int, float]], bool]:
+    """
+    BM25 순위로 (게시글 id, 점수) 목록을 offset부터 limit개 반환.
+    board가 있으면 그 게시판 글만 (idf는 전체 기준).
+    return: (결과, 다음 페이지 존재 여부)
+    """
+    tokens = set(tokenize(query))
+    if not tokens:
+        return [], False
+
+    stats = await find_one(STATS, {"_id": "writings"})
+    n = stats.get("n", 0)
+    if n <= 0:
+        return [], False
+    avgdl = stats.get("total_dl", 0) / n or 1.0
+
+    terms = await find(TERMS, {"t": {"$in": list(tokens)}, "df": {"$gt": 0}})
+    # 토큰별 posting 조회는 서로 독립적이므로 동시에 보낸다
+    posting_lists = await asyncio.gather(*[
+        find(
+            POSTINGS, {"t": term["t"]} if board is None else {"t": term["t"], "b": board},
+            {"id": 1, "tf": 1, "dl": 1}, sort=[("tf", -1)], limit=POSTINGS_LIMIT,
+        )
+        for term in terms
+    ])
+
+    scores: Counter = Counter()
+    for term, postings in zip(terms, posting_lists):
+        df = term["df"]
+        idf = math.log(1 + (n - df + 0.5) / (df + 0.5))
+        for posting in postings:
+            tf = posting["tf"]
+            norm = tf + K1 * (1 - B + B * posting["dl"] / avgdl)
+            scores[posting["id"]] += idf * tf * (K1 + 1) / norm
+
+    ranked = scores.most_common(offset + limit + 1)
+    return ranked[offset:offset + limit], len(ranked) > offset + limit
+
+
+async def reindex(writings: list[dict]) -> int:
+    """
+    역색인을 비우고 writings 전체로 다시 만든다.
+    """
+    await delete_many(POSTINGS, {})
+    await delete_many(TERMS, {})
+    await delete_many(STATS, {})
+    for writing in writings:
+        await index_writing(writing)
+    return len(writings)
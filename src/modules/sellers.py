@@ -0,0 +1,107 @@
+from .fetch import delete_many, find, find_one, modify
+
+SELLERS = "sellers"
+
+# 유저 레코드 중 판매자 목록에 쓰이는 필드. 이 필드가 바뀌면 뷰를 다시 만든다
+SELLER_FIELDS = ["nickname", "avatar", "bio", "childrenTags", "location", "baby", "clothes"]
+
+
+def _location(location) -> dict:
+    # update_location은 [si, gu] 리스트로, 예전 데이터는 {"si", "gu"}로 저장되어 있다
+    if isinstance(location, dict):
+        return {"si": location.get("si"), "gu": location.get("gu")}
+    if isinstance(location, list) and len(location) == 2:
+        return {"si": location[0], "gu": location[1]}
+    return {"si": None, "gu": None}
+
+
+def seller_view(user: dict) -> dict | None:
+    """
+    유저 레코드 -> 판매자 목록 행. 판매자가 아니면 None.
+    상품은 목록에 필요한 요약만 담고, 상세는 /user/product로 따로 조회한다.
+    """
+    clothes = user.get("clothes") or []
+    babies = user.get("baby") or []
+    # 판매자만 가져온다고 가정 (예: clothes나 baby 있는 유저)
+    if not clothes and not babies:
+        return None
+
+    products = [
+        {
+            "idx": idx,
+            "title": item.get("title"),
+            "picture": item.get("picture"),
+            "price": item.get("price"),
+            "size": item.get("size"),
+        }
+        for idx, item in enumerate(clothes)
+    ]
+    tags = set(user.get("childrenTags") or [])
+    for item in clothes + babies:
+        tags.update(item.get("tags") or [])
+
+    return {
+        "id": user.get("nickname"),
+        "nickname": user.get("nickname"),
+        "avatar": user.get("avatar", "/placeholder.svg"),
+        "bio": user.get("bio", ""),
+        "childrenTags": user.get("childrenTags", []),
+        "location": _location(user.get("location")),
+        "tags": sorted(tags),
+        "products": products,
+    }
+
+
+async def refresh_seller(nickname: str) -> None:
+    """
+    유저 하나의 판매자 뷰를 다시 만든다. (clothes/baby/프로필 변경 후 호출)
+    """
+    user = await find_one("users", {"nickname": nickname}, {field: 1 for field in SELLER_FIELDS})
+    view = seller_view(user) if user else None
+    if view is None:
+        await delete_many(SELLERS, {"id": nickname})
+        return
+    await modify(SELLERS, {"id": nickname}, {"$set": view}, upsert=True)
+
+
+async def refresh_sellers(nicknames: list[str]) -> None:
+    for nickname in nicknames:
+        await refresh_seller(nickname)
+
+
+async def rebuild_sellers() -> int:
+    """
+    판매자 뷰 전체 재생성
+    """
+    users = await find("users", {}, {"nickname": 1})
+    await delete_many(SELLERS, {})
+    await refresh_sellers([user["nickname"] for user in users if user.get("nickname")])
+    return len(users)
+
+
+def seller_query(tags: list[str] | None = None, si: str | None = None, gu: str | None = None,
+                 size_min: int | None = None, size_max: int | None = None,
+                 price_min: float | None = None, price_max: float | None = None) -> dict:
+    """
+    판매자 목록 필터. 사이즈/가격 범위는 같은 상품 하나가 둘 다 만족해야 한다.
+    """
+    query: dict = {}
+    if tags:
+        query["tags"] = {"$all": tags}
+    if si:
+        query["location.si"] = si
+    if gu:
+        query["location.gu"] = gu
+
+    product: dict = {}
+    for field, low, high in (("size", size_min, size_max), ("price", price_min, price_max)):
+        bounds = {}
+        if low is not None:
+            bounds["$gte"] = low
+        if high is not None:
+            bounds["$lte"] = high
+        if bounds:
+            product[field] = bounds
+    if product:
+        query["products"] = {"$elemMatch": product}
+    return query
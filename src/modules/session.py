@@ -0,0 +1,135 @@
+from collections import OrderedDict
+from datetime import datetime, timezone
+from fastapi import Cookie
+import asyncio
+import base64
+import hashlib
+import hmac
+import json
+import os
+import secrets
+import time
+
+from .fetch import find, modify
+
+SESSION_SECRET = os.getenv("SESSION_SECRET") or ""
+if not SESSION_SECRET:
+    # 워커마다 키가 달라지므로 여러 워커로 띄울 때는 반드시 설정할 것
+    print("[WARN] SESSION_SECRET이 없어 임시 키를 사용합니다. 재시작하면 모든 세션이 끊깁니다.")
+    SESSION_SECRET = secrets.token_hex(32)
+SESSION_TTL = int(os.getenv("SESSION_TTL") or 60 * 60 * 24 * 7)
+SESSION_CACHE_SIZE = int(os.getenv("SESSION_CACHE_SIZE") or 10000)
+# 다른 워커에서 로그아웃한 세션을 가져오는 주기 (초)
+SESSION_REVOKE_SYNC = float(os.getenv("SESSION_REVOKE_SYNC") or 30)
+
+COOKIE = "session"
+REVOKED = "revoked_sessions"  # {sid, expires}. expires가 지나면 TTL 인덱스가 지운다
+
+_key = SESSION_SECRET.encode()
+# token -> (nickname, sid, exp). 서명 검증을 건너뛰기 위한 캐시
+_cache: OrderedDict[str, tuple[str, str, int]] = OrderedDict()
+# 로그아웃된 sid -> exp
+_revoked: dict[str, int] = {}
+
+
+def _b64(raw: bytes) -> str:
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _unb64(text: str) -> bytes:
+    return base64.urlsafe_b64decode(text + "=" * (-len(text) % 4))
+
+
+def _sign(payload: str) -> str:
+    return _b64(hmac.new(_key, payload.encode(), hashlib.sha256).digest())
+
+
+def issue(nickname: str) -> str:
+    """
+    "payload.서명" 형식의 만료 시간이 있는 세션 토큰
+    """
+    payload = _b64(json.dumps({
+        "n": nickname,
+        "sid": secrets.token_urlsafe(12),
+        "exp": int(time.time()) + SESSION_TTL,
+    }, ensure_ascii=False).encode())
+    return f"{payload}.{_sign(payload)}"
+
+
+def _parse(token: str) -> tuple[str, str, int] | None:
+    payload, _, signature = token.partition(".")
+    if not signature or not hmac.compare_digest(signature, _sign(payload)):
+        return None
+    try:
+        data = json.loads(_unb64(payload))
+        return data["n"], data["sid"], int(data["exp"])
+    except (ValueError, KeyError, TypeError):
+        return None
+
+
+def verify(token: str | None) -> str:
+    """
+    유효한 토큰이면 nickname, 아니면 "". DB 조회 없이 CPU만 쓴다.
+    """
+    if not token:
+        return ""
+    entry = _cache.get(token)
+    if entry is None:
+        entry = _parse(token)
+        if entry is None:
+            return ""
+        _cache[token] = entry
+        if len(_cache) > SESSION_CACHE_SIZE:
+            _cache.popitem(last=False)
+    else:
+        _cache.move_to_end(token)
+
+    nickname, sid, exp = entry
+    if exp < time.time() or sid in _revoked:
+        _cache.pop(token, None)
+        return ""
+    return nickname
+
+
+async def current_user(session: str | None = Cookie(None)) -> str:
+    """
+    FastAPI 의존성. 로그인 세션의 nickname, 없거나 무효면 "".
+    """
+    return verify(session)
+
+
+async def revoke(token: str | None) -> None:
+    """
+    로그아웃. 이 워커에는 바로, 다른 워커에는 SESSION_REVOKE_SYNC 안에 반영된다.
+    """
+    entry = _parse(token) if token else None
+    _cache.pop(token, None)
+    if entry is None:
+        return
+    _, sid, exp = entry
+    _revoked[sid] = exp
+    await modify(REVOKED, {"sid": sid}, {"$set": {
+        "sid": sid,
+        "expires": datetime.fromtimestamp(exp, timezone.utc),
+    }}, upsert=True)
+
+
+async def load_revoked() -> None:
+    now = time.time()
+    for sid, exp in list(_revoked.items()):
+        if exp < now:
+            del _revoked[sid]
+    for item in await find(REVOKED, {"expires": {"$gt": datetime.fromtimestamp(now, timezone.utc)}}):
+        _revoked[item["sid"]] = int(item["expires"].replace(tzinfo=timezone.utc).timestamp())
+
+
+async def sync_revoked() -> None:
+    """
+    lifespan에서 백그라운드로 돌린다
+    """
+    while True:
+        try:
+            await load_revoked()
+        except Exception as e:
+            print(f"[WARN] revoked session 동기화 실패 - err={e}")
+        await asyncio.sleep(SESSION_REVOKE_SYNC)
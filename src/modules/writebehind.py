@@ -0,0 +1,185 @@
+import asyncio
+import os
+
+from pymongo.errors import BulkWriteError
+
+from .cache import cache
+from .fetch import bulk_modify
+from .sellers import refresh_sellers
+
+WRITE_BEHIND = os.getenv("WRITE_BEHIND") == "1"
+# 이 시간 동안 들어온 같은 레코드의 변경을 모아서 한 번에 쓴다 (초)
+WRITE_BEHIND_WINDOW = float(os.getenv("WRITE_BEHIND_WINDOW") or 0.2)
+# 쓰기 대기 중인 레코드 수 상한. 넘으면 요청이 flush를 기다린다 (backpressure)
+WRITE_BEHIND_MAX_PENDING = int(os.getenv("WRITE_BEHIND_MAX_PENDING") or 1000)
+
+
+def _top_fields(update: dict) -> dict[str, str]:
+    # {"$set": {"baby.0": ...}} -> {"baby": "$set"}
+    return {path.split(".")[0]: op for op, fields in update.items() for path in fields}
+
+
+class WriteBehind:
+    """
+    레코드별로 $set / $push 변경을 짧게 모았다가 bulk write 한 번으로 내보낸다.
+
+    - 같은 필드의 $set은 마지막 값만, $push는 순서대로 $each로 합친다.
+    - 이미 대기 중인 필드에 다른 연산자가 오면 ($push 뒤의 $set 등)
+      그 레코드를 먼저 flush해서 순서를 지킨다.
+    - flush 전까지는 다른 요청에서 변경이 보이지 않는다.
+    """
+    def __init__(self, collection: str, key_field: str,
+                 window: float = WRITE_BEHIND_WINDOW, max_pending: int = WRITE_BEHIND_MAX_PENDING,
+                 on_flush=None):
+        """
+        on_flush: flush가 끝난 뒤 await on_flush(keys) 로 불린다 (파생 데이터 갱신용)
+        """
+        self.collection = collection
+        self.key_field = key_field
+        self.window = window
+        self.max_pending = max_pending
+        self.on_flush = on_flush
+        self.flushed_updates = 0    # 합쳐서 실제로 보낸 업데이트 수
+        self.submitted_updates = 0  # 요청으로 들어온 업데이트 수
+        self.dropped_updates = 0    # DB가 거부해서 버린 업데이트 수
+        self._pending: dict[str, dict] = {}
+        # 쓰기에 실패해서 다시 시도할 배치들 (순서대로)
+        self._failed: list[dict[str, dict]] = []
+        self._space = asyncio.Condition()
+        self._write_lock = asyncio.Lock()
+        self._task: asyncio.Task | None = None
+
+    async def submit(self, key: str, update: dict) -> None:
+        """
+        update: {"$set": {필드: 값}} 또는 {"$push": {필드: 값}}
+        """
+        pending = self._pending.get(key)
+        if pending is not None:
+            fields = _top_fields(pending)
+            if any(fields.get(field, op) != op for field, op in _top_fields(update).items()):
+                await self.flush(key)
+                pending = None
+
+        if pending is None:
+            async with self._space:
+                # 다시 시도할 변경도 대기 중인 레코드 수에 포함
+                await self._space.wait_for(
+                    lambda: key in self._pending or len(self._pending) + self._failed_count() < self.max_pending
+                )
+                pending = self._pending.setdefault(key, {})
+
+        for field, value in update.get("$set", {}).items():
+            pending.setdefault("$set", {})[field] = value
+        for field, value in update.get("$push", {}).items():
+            pending.setdefault("$push", {}).setdefault(field, {"$each": []})["$each"].append(value)
+        self.submitted_updates += 1
+
+    async def flush(self, key: str | None = None) -> None:
+        """
+        key의 (없으면 전부) 대기 중인 변경을 DB에 쓴다.
+        다른 flush가 쓰고 있는 중이면 그 쓰기가 끝날 때까지 기다린 뒤 돌아온다.
+        """
+        # 꺼내는 것부터 잠금 안에서 해야, 이미 꺼내 가서 쓰는 중인 변경을 기다릴 수 있다.
+        # flush끼리 순서가 뒤바뀌지 않도록 실제 쓰기도 하나씩
+        async with self._write_lock:
+            if key is None:
+                batch, self._pending = self._pending, {}
+            else:
+                batch = {key: self._pending.pop(key)} if key in self._pending else {}
+            if batch:
+                async with self._space:
+                    self._space.notify_all()
+
+            # 앞서 일시적으로 실패한 배치를 먼저 다시 쓴다
+            batches = self._failed + [batch]
+            retry: list[dict[str, dict]] = []
+            written: list[str] = []
+            for current in batches:
+                # 다시 시도할 변경이 남아 있는 key는 순서를 지키기 위해 그 뒤에 줄 세운다
+                blocked = {batch_key for held in retry for batch_key in held}
+                held = {batch_key: update for batch_key, update in current.items() if batch_key in blocked}
+                current = {batch_key: update for batch_key, update in current.items() if batch_key not in blocked}
+                if current:
+                    try:
+                        await bulk_modify(self.collection, [
+                            ({self.key_field: batch_key}, update) for batch_key, update in current.items()
+                        ])
+                        done = list(current)
+                    except BulkWriteError as e:
+                        # unordered bulk write: 에러가 난 연산만 빼고는 이미 반영됐다.
+                        # 연산별 에러(배열이 아닌 필드에 $push 등)는 다시 해도 실패하므로 버린다
+                        cache.invalidate(self.collection)
+                        keys = list(current)
+                        errors = {keys[error["index"]]: error.get("errmsg") for error in e.details.get("writeErrors", [])}
+                        for batch_key, message in errors.items():
+                            print(f"[ERROR] write-behind 변경 버림 - {self.collection}, "
+                                  f"{self.key_field}={batch_key}, err={message}")
+                        self.dropped_updates += len(errors)
+                        done = [batch_key for batch_key in keys if batch_key not in errors]
+                    except Exception as e:
+                        # 연결 끊김, 타임아웃 등은 다음 flush에 다시 시도
+                        print(f"[WARN] write-behind flush 실패, 다음 flush에 다시 시도 - "
+                              f"{self.collection}, {len(current)} records, err={e}")
+                        held.update(current)
+                        done = []
+                    written += done
+                    self.flushed_updates += len(done)
+                if held:
+                    retry.append(held)
+            self._failed = retry
+            async with self._space:
+                self._space.notify_all()
+
+        if written and self.on_flush is not None:
+            await self.on_flush(written)
+
+    def _failed_count(self) -> int:
+        return sum(len(batch) for batch in self._failed)
+
+    def failed(self, key: str) -> bool:
+        """
+        key의 변경 중 쓰기에 실패해서 아직 반영되지 않은 것이 있는지
+        """
+        return any(key in batch for batch in self._failed)
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.window)
+            try:
+                await self.flush()
+            except Exception as e:
+                print(f"[WARN] write-behind on_flush 실패 - {self.collection}, err={e}")
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """
+        주기 flush를 멈추고 남은 변경을 모두 쓴다. (종료 시)
+        """
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+        if self._failed:
+            lost = self._failed_count()
+            print(f"[ERROR] write-behind 종료 시까지 쓰지 못한 변경 - {self.collection}, {lost} records")
+
+    def stats(self) -> dict:
+        return {
+            "pending": len(self._pending),
+            "failed": self._failed_count(),
+            "dropped": self.dropped_updates,
+            "submitted": self.submitted_updates,
+            "flushed": self.flushed_updates,
+        }
+
+
+# /user/update_* 프로필 변경용. WRITE_BEHIND=1 일 때만 사용
+# flush 후 판매자 목록 뷰도 갱신
+profile_writes = WriteBehind("users", "nickname", on_flush=refresh_sellers)
@@ -1,4 +1,6 @@
 from .chat import router
 from .sign import router
 from .user import router
-from .board import router
\ No newline at end of file
+from .board import router
+from .health import router
+from .jjim import router
\ No newline at end of file
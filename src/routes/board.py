@@ -1,5 +1,6 @@
-from fastapi import APIRouter, Request
+from fastapi import APIRouter, Depends, Query
 from pydantic import BaseModel
+from typing import Literal
 import modules
 
 router = APIRouter(
@@ -8,57 +9,116 @@ router = APIRouter(
 )
 
 @router.get("/")
-async def index():
-    document: dict = await modules.read("board", "boards") or {}
-    data = document.get("boards")
-    if(not data):
+async def index(
+    limit: int = Query(20, ge=1, le=modules.MAX_LIMIT),
+    cursor: str | None = None,
+):
+    try:
+        data, next_cursor = await modules.paginate("boards", {}, limit=limit, cursor=cursor)
+    except modules.CursorError as e:
+        return {"code": 400, "message": str(e)}
+    if(not data and not cursor):
         return {
             "code" : 403,
             "message" : "Please check database."
         }
     return {
         "code" : 200,
-        "data" : data
+        "data" : [board.get("value", board) for board in data],
+        "has_more" : next_cursor is not None,
+        "next_cursor" : next_cursor
     }
+# 목록 행에 필요한 필드만 DB에서 받는다 (본문과 좋아요/댓글 배열은 전송하지 않음)
+# 좋아요/댓글 수는 like/comment 엔드포인트가 유지하는 카운터를 쓴다
+SUMMARY_PROJECTION = {
+    "id" : 1,
+    "writer" : 1,
+    "liked" : {"$ifNull" : ["$liked_count", 0]},
+    "comments" : {"$ifNull" : ["$comment_count", 0]},
+}
+
 @router.get("/info")
-async def info(board_name: str):
-    document: dict = await modules.read("board", "writings") or {}
-    data = document.get("writings")
-    if(not data):
-        return {
-            "code" : 403,
-            "message" : "Please check database."
-        }
+async def info(
+    board_name: str,
+    limit: int = Query(20, ge=1, le=modules.MAX_LIMIT),
+    after_id: int | None = None,
+    cursor: str | None = None,
+    sort: Literal["id", "date"] = "id",
+    order: Literal["asc", "desc"] = "asc",
+):
+    try:
+        data, next_cursor = await modules.paginate(
+            "writings", {"board": board_name},
+            sort_field=sort, descending=order == "desc",
+            limit=limit, cursor=cursor, after_id=after_id,
+            projection=SUMMARY_PROJECTION,
+        )
+    except modules.CursorError as e:
+        return {"code": 400, "message": str(e)}
     response: list[dict] = []
     for writing in data:
-        if(writing.get("board") != board_name):
-            continue
         response.append({
             "id" : writing.get("id"),
             "writer" : writing.get("writer"),
-            "liked" : len(writing.get("liked")),
-            "comments" : len(writing.get("comment") or [])
+            "liked" : writing.get("liked"),
+            "comments" : writing.get("comments")
         })
     return {
         "code" : 200,
-        "data" : response
+        "data" : response,
+        "has_more" : next_cursor is not None,
+        "next_cursor" : next_cursor
+    }
+@router.get("/search")
+async def search(
+    q: str,
+    board_name: str | None = None,
+    limit: int = Query(20, ge=1, le=modules.MAX_LIMIT),
+    cursor: str | None = None,
+):
+    # 순위 결과라서 키셋 대신 offset을 cursor에 담는다
+    try:
+        offset = 0
+        if cursor:
+            values = modules.decode_cursor(cursor)
+            offset = values.get("o")
+            # 다른 검색어의 cursor나 잘못된 offset은 받지 않는다
+            if values.get("q") != q or type(offset) is not int or offset < 0:
+                raise modules.CursorError("invalid cursor")
+    except modules.CursorError as e:
+        return {"code": 400, "message": str(e)}
+    ranked, has_more = await modules.search.search(q, board_name, offset, limit)
+
+    ids = [writing_id for writing_id, _ in ranked]
+    rows = await modules.find("writings", {"id": {"$in": ids}}, {**SUMMARY_PROJECTION, "title": 1})
+    by_id = {row["id"]: row for row in rows}
+    response: list[dict] = []
+    for writing_id, score in ranked:
+        writing = by_id.get(writing_id)
+        if not writing:
+            continue
+        response.append({
+            "id" : writing_id,
+            "title" : writing.get("title"),
+            "writer" : writing.get("writer"),
+            "liked" : writing.get("liked"),
+            "comments" : writing.get("comments"),
+            "score" : round(score, 4)
+        })
+    return {
+        "code" : 200,
+        "data" : response,
+        "has_more" : has_more,
+        "next_cursor" : modules.encode_cursor({"q": q, "o": offset + limit}) if has_more else None
     }
 @router.get("/content")
 async def content(board_id: int):
-    document: dict = await modules.read("board", "writings") or {}
-    data = document.get("writings")
-    if(not data):
+    writing: dict = await modules.find_one("writings", {"id": board_id}, {"liked": 0})
+    if writing:
         return {
-            "code" : 403,
-            "message" : "Please check database."
-        }   
-    for writing in data:
-        if(writing.get("id") == board_id):
-            writing["liked"] = len(writing["liked"])
-            return {
-                "code" : 200,
-                "data" : writing
-            }
+            "code" : 200,
+            "data" : {**writing, "liked" : writing.get("liked_count", 0)}
+        }
     return {
         "code" : 403,
         "message" : "Title not found."
@@ -78,52 +138,128 @@ class ModifyWritingModel(WritingModel):
 class AddWritingModel(WritingModel):
     pass
 
+class LikeModel(BaseModel):
+    board_id: int
+
+class CommentModel(BaseModel):
+    board_id: int
+    date: str
+    content: str
+
+class DeleteCommentModel(BaseModel):
+    board_id: int
+    comment_id: int
+
 # ----- Endpoints -----
 @router.post("/modify")
-async def modify(request: Request, body: ModifyWritingModel):
-    nickname: str = request.cookies.get("session") or ""
-    document: dict = await modules.read("board", "writings") or {}
-    data = document.get("writings") or []
-
-    target_idx = None
-    for idx, writing in enumerate(data):
-        if writing.get("id") == body.board_id:
-            target_idx = idx
-            break
-    else:
-        return {"code": 403, "message": "Title not found."}
+async def modify(body: ModifyWritingModel, nickname: str = Depends(modules.current_user)):
+    def apply(writing: dict):
+        if nickname != writing.get("writer"):
+            return None
+        return {
+            "title": body.title,
+            "writer": body.writer,
+            "board": body.board,
+            "date": body.date,
+            "content": body.content,
+        }
 
-    if nickname != data[target_idx].get("writer"):
+    try:
+        writing, applied = await modules.update_versioned("writings", {"id": body.board_id}, apply)
+    except modules.ConflictError:
+        return {"code": 409, "message": "Writing is being modified. Try again."}
+    if not writing:
+        return {"code": 403, "message": "Title not found."}
+    if not applied:
         return {"code": 401, "message": "Not your writing."}
-
-    data[target_idx] = {
-        "id": data[target_idx]["id"],
-        "title": body.title,
-        "writer": body.writer,
+    await modules.search.index_writing({
+        "id": body.board_id,
         "board": body.board,
-        "date": body.date,
+        "title": body.title,
         "content": body.content,
-    }
-    await modules.write("board", data, "writings")
+    })
     return {"code": 200, "message": "Modify successfully."}
 
 
 @router.post("/add")
-async def add(request: Request, body: AddWritingModel):
-    nickname: str = request.cookies.get("session") or ""
-    document: dict = await modules.read("board", "writings") or {}
-    data = document.get("writings") or []
-
-    # ID 자동 증가
-    biggest_id = max((item.get("id", -1) for item in data), default=-1)
-
-    data.append({
-        "id": biggest_id + 1,
+async def add(body: AddWritingModel, nickname: str = Depends(modules.current_user)):
+    # ID 자동 증가 (원자적 시퀀스)
+    writing = {
+        "id": await modules.next_id("writings"),
         "title": body.title,
         "writer": body.writer,
         "board": body.board,
         "date": body.date,
         "content": body.content,
+        "liked": [],
+        "liked_count": 0,
+        "comment": [],
+        "comment_count": 0,
+    }
+    await modules.insert_one("writings", writing)
+    await modules.search.index_writing(writing)
+    return {"code": 200, "message": "Add successfully."}
+
+
+# ----- 좋아요 / 댓글 -----
+# 배열 변경과 카운터 증감을 한 번의 조건부 업데이트로 처리해서
+# 동시에 눌러도 카운터가 배열과 어긋나지 않는다.
+async def writing_exists(board_id: int) -> bool:
+    return bool(await modules.find_one("writings", {"id": board_id}, {"id": 1}))
+
+@router.post("/like")
+async def like(body: LikeModel, nickname: str = Depends(modules.current_user)):
+    if not nickname:
+        return {"code": 401, "message": "Please login"}
+    if await modules.modify("writings", {"id": body.board_id, "liked": {"$ne": nickname}}, {
+        "$push": {"liked": nickname},
+        "$inc": {"liked_count": 1},
+    }):
+        return {"code": 200, "message": "Liked."}
+    if not await writing_exists(body.board_id):
+        return {"code": 403, "message": "Title not found."}
+    return {"code": 200, "message": "Already liked."}
+
+@router.post("/unlike")
+async def unlike(body: LikeModel, nickname: str = Depends(modules.current_user)):
+    if not nickname:
+        return {"code": 401, "message": "Please login"}
+    if await modules.modify("writings", {"id": body.board_id, "liked": nickname}, {
+        "$pull": {"liked": nickname},
+        "$inc": {"liked_count": -1},
+    }):
+        return {"code": 200, "message": "Unliked."}
+    if not await writing_exists(body.board_id):
+        return {"code": 403, "message": "Title not found."}
+    return {"code": 200, "message": "Not liked."}
+
+@router.post("/comment")
+async def comment(body: CommentModel, nickname: str = Depends(modules.current_user)):
+    if not nickname:
+        return {"code": 401, "message": "Please login"}
+    if not await writing_exists(body.board_id):
+        return {"code": 403, "message": "Title not found."}
+    await modules.modify("writings", {"id": body.board_id}, {
+        "$push": {"comment": {
+            "id": await modules.next_id("comments"),
+            "writer": nickname,
+            "date": body.date,
+            "content": body.content,
+        }},
+        "$inc": {"comment_count": 1},
     })
-    await modules.write("board", data, "writings")
-    return {"code": 200, "message": "Add successfully."}
\ No newline at end of file
+    return {"code": 200, "message": "Comment successfully."}
+
+@router.post("/comment/delete")
+async def delete_comment(body: DeleteCommentModel, nickname: str = Depends(modules.current_user)):
+    if not nickname:
+        return {"code": 401, "message": "Please login"}
+    if await modules.modify("writings", {
+        "id": body.board_id,
+        "comment": {"$elemMatch": {"id": body.comment_id, "writer": nickname}},
+    }, {
+        "$pull": {"comment": {"id": body.comment_id}},
+        "$inc": {"comment_count": -1},
+    }):
+        return {"code": 200, "message": "Delete successfully."}
+    return {"code": 403, "message": "Comment not found."}
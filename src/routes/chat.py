@@ -1,7 +1,9 @@
-from fastapi import APIRouter, Request
+from fastapi import APIRouter, Depends, WebSocket
+from fastapi.responses import ORJSONResponse
+import asyncio
 from datetime import datetime
 from pydantic import BaseModel, Field
-from typing import List, Optional
+from typing import Annotated, Dict, List, Optional
 import modules
 
 # ==================================================
@@ -15,6 +17,7 @@ class Message(BaseModel):
     who: str            # 메시지를 보낸 사용자
     when: str           # 메시지 전송 시간 (YYYY-MM-DD/HH:MM)
     content: str        # 메시지 내용
+    seq: Optional[int] = None  # 방 안에서의 순번 (0부터, /chat/sync 커서로 사용)
 
 
 class ChatRoom(BaseModel):
@@ -43,6 +46,7 @@ class ChatRoomSummary(BaseModel):
     """
     with_: str = Field(..., alias="with")
     last_message: Optional[Message]
+    unread: int = 0     # 읽지 않은 메시지 수
 
     model_config = {
         "populate_by_name": True
@@ -73,6 +77,42 @@ class SendChatRequest(BaseModel):
     content: str
 
 
+class ReadRequest(BaseModel):
+    other_user: str
+
+
+class SyncRequest(BaseModel):
+    """
+    cursors: 상대 사용자 -> 마지막으로 받은 메시지 seq
+    last_n: cursors에 없는 방은 마지막 n개만 (없으면 전체)
+    """
+    cursors: Dict[str, Annotated[int, Field(ge=-1)]] = {}
+    last_n: Optional[int] = Field(None, ge=1)
+
+
+class RoomSync(BaseModel):
+    """
+    방 하나의 새 메시지
+    """
+    with_: str = Field(..., alias="with")
+    messages: List[Message]
+    cursor: int         # 다음 sync 때 보낼 seq (이 방의 마지막 메시지)
+
+    model_config = {
+        "populate_by_name": True
+    }
+
+
+class SyncResponse(BaseModel):
+    code: int
+    data: List[RoomSync]
+
+
+# 목록 응답은 DB에서 읽은 (저장할 때 검증된) dict를 그대로 orjson으로 인코딩한다.
+# 모델을 만들고 response_model로 다시 검증하는 이중 검증을 건너뛰고,
+# response_model은 OpenAPI 명세용으로만 남긴다.
+
+
 # ==================================================
 # 2. Router 설정
 # ==================================================
@@ -89,6 +129,7 @@ router = APIRouter(
 @router.get(
     "/chat/list",
     response_model=ChatListResponse,
+    response_class=ORJSONResponse,
     summary="전체 채팅 목록 조회 (관리용)",
     description="DB에 저장된 모든 채팅 데이터를 반환한다.",
 )
@@ -97,13 +138,14 @@ async def get_chat_list():
     ✅ 응답 코드 설명
     - 200 : 전체 채팅 목록 정상 반환
     """
-    document: dict = await modules.read("chat") or {}
-    data: list[dict] = document.get("data", [])
+    rooms: list[dict] = await modules.find("chats", {}, {"key": 1, "users": 1})
+    logs = await asyncio.gather(*[modules.chat.read_messages(room["key"]) for room in rooms])
+    data = [{"users": room["users"], "log": log} for room, (log, _) in zip(rooms, logs)]
 
-    return {
+    return ORJSONResponse({
         "code": 200,
         "data": data
-    }
+    })
 
 
 # ==================================================
@@ -113,31 +155,27 @@ async def get_chat_list():
 @router.get(
     "/chat",
     response_model=UserChatResponse,
+    response_class=ORJSONResponse,
     summary="내 채팅 전체 로그 조회",
     description="로그인한 사용자가 참여한 모든 채팅방의 대화 내용을 반환한다.",
     responses={401: {"model": BasicResponse}}
 )
-async def get_chat(request: Request):
-    nickname: str = request.cookies.get("session") or ""
+async def get_chat(nickname: str = Depends(modules.current_user)):
     if not nickname:
-        return BasicResponse(code=401, message="로그인 정보가 없습니다.")
+        return ORJSONResponse({"code": 401, "message": "로그인 정보가 없습니다."})
 
-    document = await modules.read("chat") or {}
-    chats = document.get("data", [])
+    rooms = await modules.chat.rooms_of(nickname)
+    logs = await asyncio.gather(*[modules.chat.read_messages(room["key"]) for room in rooms])
 
     result = []
 
-    for chat in chats:
-        if nickname in chat.get("users", []):
-            other = [u for u in chat["users"] if u != nickname][0]
-            result.append(
-                UserChat(
-                    with_=other,
-                    log=chat.get("log", [])
-                )
-            )
+    for room, (log, _) in zip(rooms, logs):
+        result.append({
+            "with": modules.chat.partner(room, nickname),
+            "log": log
+        })
 
-    return UserChatResponse(code=200, data=result)
+    return ORJSONResponse({"code": 200, "data": result})
 
 
 # ==================================================
@@ -147,33 +185,28 @@ async def get_chat(request: Request):
 @router.get(
     "/chat/rooms",
     response_model=ChatRoomSummaryResponse,
+    response_class=ORJSONResponse,
     summary="채팅방 목록 조회",
     description="로그인한 사용자가 참여한 채팅방 목록과 마지막 메시지를 반환한다.",
     responses={401: {"model": BasicResponse}}
 )
-async def get_chat_rooms(request: Request):
-    nickname: str = request.cookies.get("session") or ""
+async def get_chat_rooms(nickname: str = Depends(modules.current_user)):
     if not nickname:
-        return BasicResponse(code=401, message="로그인 정보가 없습니다.")
+        return ORJSONResponse({"code": 401, "message": "로그인 정보가 없습니다."})
 
-    document = await modules.read("chat") or {}
-    chats = document.get("data", [])
+    # 전송 때마다 갱신되는 사용자별 방 요약을 한 번에 읽는다
+    inbox = await modules.chat.inbox_of(nickname)
 
     rooms = []
 
-    for chat in chats:
-        if nickname in chat.get("users", []):
-            other = [u for u in chat["users"] if u != nickname][0]
-            last_message = chat["log"][-1] if chat.get("log") else None
+    for room in inbox:
+        rooms.append({
+            "with": room["with"],
+            "last_message": room.get("last_message"),
+            "unread": room.get("unread", 0)
+        })
 
-            rooms.append(
-                ChatRoomSummary(
-                    with_=other,
-                    last_message=last_message
-                )
-            )
-
-    return ChatRoomSummaryResponse(code=200, data=rooms)
+    return ORJSONResponse({"code": 200, "data": rooms})
 
 
 # ==================================================
@@ -186,43 +219,134 @@ async def get_chat_rooms(request: Request):
     summary="채팅 메시지 전송",
     description="상대 사용자에게 메시지를 전송하며 채팅방이 없으면 자동 생성된다."
 )
-async def send_chat(request: Request, data: SendChatRequest):
+async def send_chat(data: SendChatRequest, nickname: str = Depends(modules.current_user)):
     """
     ✅ 응답 코드 설명
     - 200 : 메시지 전송 완료
     - 401 : 로그인 필요
     """
-    nickname = request.cookies.get("session") or ""
     if not nickname:
         return BasicResponse(code=401, message="로그인 정보가 없습니다.")
 
-    document = await modules.read("chat") or {}
-    chats = document.get("data", [])
-
     now = datetime.now().strftime("%Y-%m-%d/%H:%M")
-
-    # 기존 채팅방 확인
-    for chat in chats:
-        if set(chat.get("users", [])) == {nickname, data.other_user}:
-            chat["log"].append({
-                "who": nickname,
-                "when": now,
-                "content": data.content
-            })
-            await modules.write("chat", chats)
-            return BasicResponse(code=200, message="메시지 전송 완료")
-
-    # 채팅방 없으면 생성
-    new_chat = {
-        "users": [nickname, data.other_user],
-        "log": [{
-            "who": nickname,
-            "when": now,
-            "content": data.content
-        }]
+    message = {
+        "who": nickname,
+        "when": now,
+        "content": data.content
     }
 
-    chats.append(new_chat)
-    await modules.write("chat", chats)
+    # 사용자 쌍 key로 방을 찾아 원자적으로 추가, 채팅방 없으면 생성
+    seq = await modules.chat.append_message(nickname, data.other_user, message)
+    await modules.chat.update_inbox(nickname, data.other_user, message)
+
+    # 저장된 뒤 양쪽 WebSocket 연결로 바로 전달 (보낸 사람의 다른 기기 포함)
+    event = {**message, "seq": seq}
+    modules.hub.publish(data.other_user, {"type": "message", "with": nickname, "message": event})
+    if data.other_user != nickname:
+        modules.hub.publish(nickname, {"type": "message", "with": data.other_user, "message": event})
 
-    return BasicResponse(code=200, message="메시지 전송 완료")
\ No newline at end of file
+    return BasicResponse(code=200, message="메시지 전송 완료")
+
+
+# ==================================================
+# 7. 증분 동기화
+# POST /chat/sync
+# ==================================================
+@router.post(
+    "/sync",
+    response_model=SyncResponse,
+    response_class=ORJSONResponse,
+    summary="새 메시지만 동기화",
+    description="방별로 마지막으로 받은 seq를 보내면 그 이후 메시지만 반환한다. 새 메시지가 없는 방은 빠진다.",
+    responses={401: {"model": BasicResponse}}
+)
+async def sync_chat(data: SyncRequest, nickname: str = Depends(modules.current_user)):
+    """
+    ✅ 응답 코드 설명
+    - 200 : 새 메시지 반환 (cursor를 저장해 두었다가 다음 요청에 사용)
+    - 401 : 로그인 필요
+    """
+    if not nickname:
+        return ORJSONResponse({"code": 401, "message": "로그인 정보가 없습니다."})
+
+    rooms = await modules.chat.rooms_of(nickname)
+    partners = [modules.chat.partner(room, nickname) for room in rooms]
+    logs = await asyncio.gather(*[
+        modules.chat.read_messages(room["key"], after=data.cursors[other])
+        if other in data.cursors else
+        modules.chat.read_messages(room["key"], last_n=data.last_n)
+        for room, other in zip(rooms, partners)
+    ])
+
+    result = []
+    for other, (messages, _) in zip(partners, logs):
+        if not messages:
+            continue
+        result.append({
+            "with": other,
+            "messages": messages,
+            "cursor": messages[-1]["seq"]
+        })
+
+    # 받아 간 방은 읽음 처리
+    await modules.chat.mark_read(nickname, [room["with"] for room in result])
+
+    return ORJSONResponse({"code": 200, "data": result})
+
+
+# ==================================================
+# 8. 채팅방 읽음 처리
+# POST /chat/read
+# ==================================================
+@router.post(
+    "/read",
+    response_model=BasicResponse,
+    summary="채팅방 읽음 처리",
+    description="상대 사용자와의 채팅방 unread를 0으로 만든다."
+)
+async def read_chat(data: ReadRequest, nickname: str = Depends(modules.current_user)):
+    if not nickname:
+        return BasicResponse(code=401, message="로그인 정보가 없습니다.")
+    await modules.chat.mark_read(nickname, [data.other_user])
+    return BasicResponse(code=200, message="읽음 처리 완료")
+
+
+# ==================================================
+# 9. 실시간 메시지 수신 (WebSocket)
+# WS /chat/ws
+# ==================================================
+@router.websocket("/ws")
+async def chat_ws(websocket: WebSocket):
+    """
+    로그인한 사용자에게 새 메시지를 push 한다. (polling 대체)
+    이벤트: {"type": "message", "with": 상대, "message": {who, when, content, seq}}
+    너무 느려서 끊기면 code 1013으로 닫히고, 다시 연결한 뒤 /chat/sync로 빠진 메시지를 받으면 된다.
+    """
+    nickname = modules.session.verify(websocket.cookies.get(modules.session.COOKIE))
+    if not nickname:
+        await websocket.close(code=1008)
+        return
+    await websocket.accept()
+    subscription = modules.hub.subscribe(nickname)
+
+    async def send():
+        while True:
+            event = await subscription.get()
+            if event is None:
+                await websocket.close(code=1013)
+                return
+            await websocket.send_json(event)
+
+    async def receive():
+        # 클라이언트가 보내는 건 무시하고 연결 종료만 감지
+        while True:
+            await websocket.receive_text()
+
+    tasks = [asyncio.create_task(send()), asyncio.create_task(receive())]
+    try:
+        await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        modules.hub.unsubscribe(subscription)
@@ -0,0 +1,29 @@
+from fastapi import APIRouter
+import modules
+
+router = APIRouter(
+    prefix="/health",
+    tags=["서버 상태 엔드포인트"]
+)
+
+@router.get("")
+async def health():
+    """
+    DB 왕복 시간과 커넥션 풀/캐시 사용량. 풀 크기 조정용.
+    """
+    try:
+        latency = await modules.ping()
+    except Exception as e:
+        return {
+            "code" : 503,
+            "message" : f"Database unreachable: {e}",
+            "pool" : modules.pool_stats.snapshot()
+        }
+    return {
+        "code" : 200,
+        "db_latency_ms" : round(latency, 3),
+        "pool" : modules.pool_stats.snapshot(),
+        "cache" : modules.cache.stats(),
+        "chat_hub" : modules.hub.stats(),
+        "write_behind" : modules.profile_writes.stats() if modules.WRITE_BEHIND else None
+    }
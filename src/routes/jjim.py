@@ -1,11 +1,118 @@
-from fastapi import FastAPI, Request
+from fastapi import APIRouter, Depends, Query
+from pydantic import BaseModel, Field
+from typing import List, Literal
+import modules
+from .board import SUMMARY_PROJECTION
 
-router = FastAPI(
+router = APIRouter(
     prefix="/jjim",
     tags=["찜 관련 엔드포인트"]
 )
 
+# 찜 한 건 = jjim 도큐먼트 하나 {owner, kind, target, id}
+# (owner, kind, target) unique 인덱스로 토글/포함 여부가 O(1)
+# target: 게시글은 str(id), 옷은 "판매자 닉네임:clothes idx"
+Kind = Literal["writing", "clothes"]
+
+# ----- Pydantic 모델 -----
+class ToggleModel(BaseModel):
+    kind: Kind
+    target: str
+
+class CheckModel(BaseModel):
+    kind: Kind
+    targets: List[str] = Field(max_length=modules.MAX_LIMIT)
+
+# ----- Endpoints -----
+@router.post("/toggle")
+async def toggle(body: ToggleModel, nickname: str = Depends(modules.current_user)):
+    if not nickname:
+        return {"code": 401, "message": "Please login"}
+    key = {"owner": nickname, "kind": body.kind, "target": body.target}
+    if await modules.delete_many("jjim", key):
+        return {"code": 200, "jjim": False}
+    try:
+        await modules.insert_one("jjim", {**key, "id": await modules.next_id("jjim")})
+    except modules.DuplicateKeyError:
+        # 동시에 두 번 눌린 경우. 이미 찜 되어 있음
+        pass
+    return {"code": 200, "jjim": True}
+
+@router.post("/check")
+async def check(body: CheckModel, nickname: str = Depends(modules.current_user)):
+    """
+    목록 화면의 항목들에 대한 liked_by_me 여부를 한 번에 조회
+    """
+    if not nickname:
+        return {"code": 200, "data": {target: False for target in body.targets}}
+    rows = await modules.find("jjim", {
+        "owner": nickname, "kind": body.kind, "target": {"$in": body.targets}
+    }, {"target": 1})
+    liked = {row["target"] for row in rows}
+    return {"code": 200, "data": {target: target in liked for target in body.targets}}
+
+@router.get("/list")
+async def jjim_list(
+    kind: Kind,
+    limit: int = Query(20, ge=1, le=modules.MAX_LIMIT),
+    cursor: str | None = None,
+    nickname: str = Depends(modules.current_user),
+):
+    """
+    내 찜 목록 (최근 찜한 순)
+    """
+    if not nickname:
+        return {"code": 401, "message": "Please login"}
+    try:
+        data, next_cursor = await modules.paginate(
+            "jjim", {"owner": nickname, "kind": kind},
+            descending=True, limit=limit, cursor=cursor, projection={"target": 1},
+        )
+    except modules.CursorError as e:
+        return {"code": 400, "message": str(e)}
+    return {
+        "code": 200,
+        "data": [row["target"] for row in data],
+        "has_more": next_cursor is not None,
+        "next_cursor": next_cursor
+    }
+
 @router.get("/board_info")
-async def board_info(request: Request):
-    
-    return
\ No newline at end of file
+async def board_info(
+    limit: int = Query(20, ge=1, le=modules.MAX_LIMIT),
+    cursor: str | None = None,
+    nickname: str = Depends(modules.current_user),
+):
+    """
+    내가 찜한 게시글 목록 (/board/info와 같은 요약 형식)
+    """
+    if not nickname:
+        return {"code": 401, "message": "Please login"}
+    try:
+        data, next_cursor = await modules.paginate(
+            "jjim", {"owner": nickname, "kind": "writing"},
+            descending=True, limit=limit, cursor=cursor, projection={"target": 1},
+        )
+    except modules.CursorError as e:
+        return {"code": 400, "message": str(e)}
+
+    ids = [int(row["target"]) for row in data if row["target"].isdigit()]
+    writings = await modules.find("writings", {"id": {"$in": ids}}, SUMMARY_PROJECTION)
+    by_id = {writing["id"]: writing for writing in writings}
+    response: list[dict] = []
+    for writing_id in ids:
+        writing = by_id.get(writing_id)
+        if not writing:
+            continue
+        response.append({
+            "id": writing_id,
+            "writer": writing.get("writer"),
+            "liked": writing.get("liked"),
+            "comments": writing.get("comments")
+        })
+    return {
+        "code": 200,
+        "data": response,
+        "has_more": next_cursor is not None,
+        "next_cursor": next_cursor
+    }
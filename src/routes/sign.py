@@ -1,4 +1,4 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Cookie
 import modules
 from pydantic import BaseModel
 from fastapi import Response
@@ -14,31 +14,52 @@ class LoginBody(BaseModel):
 
 @router.post("/up")
 async def signup(body: LoginBody):
-    document: dict = await modules.read("user", "data") or {}
-    data: list[dict] = document["data"]
-
-    data.append({
-        "nickname" : body.nickname,
-        "pw" : body.pw
-    })
-    await modules.write("user", data)
+    try:
+        await modules.insert_one("users", {
+            "nickname" : body.nickname,
+            "pw" : await modules.hash_password(body.pw)
+        })
+    except modules.DuplicateKeyError:
+        return {
+            "code" : 409,
+            "message" : "nickname already exists"
+        }
     return {"code" : 200}
 
 
 @router.post("/in")
 async def signin(body: LoginBody):
-    document: dict = await modules.read("user") or {}
-    data: list[dict] = document["data"]
-    for item in data:
-        if(item.get("nickname") != body.nickname or item.get("pw") != body.pw):
-            continue
+    user: dict = await modules.find_one("users", {"nickname": body.nickname}, {"nickname": 1, "pw": 1})
+    # 없는 nickname이어도 검증 시간은 같게 (응답 시간으로 가입 여부를 알 수 없도록)
+    ok, needs_rehash = await modules.verify_password(body.pw, user.get("pw") if user else None)
+    if ok:
+        if needs_rehash:
+            # 평문/예전 파라미터로 저장된 비밀번호를 현재 방식으로 교체
+            await modules.update_one(
+                "users", {"nickname": body.nickname}, {"pw": await modules.hash_password(body.pw)}
+            )
         response = Response(
             content='{"code" : 200}', media_type="application/json"
         )
-        response.set_cookie(key="session", value=body.nickname, httponly=True)
+        response.set_cookie(
+            key=modules.session.COOKIE,
+            value=modules.session.issue(body.nickname),
+            max_age=modules.session.SESSION_TTL,
+            httponly=True,
+        )
         return response
     
     return {
         "code" : 404,
         "message" : "user not found"
-    }
\ No newline at end of file
+    }
+
+
+@router.post("/out")
+async def signout(session: str | None = Cookie(None)):
+    await modules.session.revoke(session)
+    response = Response(
+        content='{"code" : 200}', media_type="application/json"
+    )
+    response.delete_cookie(key=modules.session.COOKIE)
+    return response
\ No newline at end of file
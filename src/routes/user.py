@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Request
+from fastapi import APIRouter, Depends, Query
 from pydantic import BaseModel
 from typing import List
 import modules
@@ -9,26 +9,64 @@ router = APIRouter(
 )
 
 @router.get("/get_sellers")
-async def get_sellers(request: Request):
-    document: dict = await modules.read("user", "data") or {}
-    data: list[dict] = document.get("data", [])
+async def get_sellers(
+    tag: List[str] | None = Query(None),
+    si: str | None = None,
+    gu: str | None = None,
+    size_min: int | None = None,
+    size_max: int | None = None,
+    price_min: float | None = None,
+    price_max: float | None = None,
+    limit: int = Query(20, ge=1, le=modules.MAX_LIMIT),
+    cursor: str | None = None,
+):
+    """
+    미리 만들어 둔 판매자 뷰(sellers)에서 필터 + 페이지네이션.
+    products에는 요약만 들어 있고 상세는 /user/product로 조회한다.
+    """
+    query = modules.seller_query(tag, si, gu, size_min, size_max, price_min, price_max)
+    try:
+        data, next_cursor = await modules.paginate("sellers", query, limit=limit, cursor=cursor)
+    except modules.CursorError as e:
+        return {"code": 400, "message": str(e)}
 
     sellers = []
-    for user in data:
-        # 판매자만 가져온다고 가정 (예: clothes나 baby 있는 유저)
-        if user.get("clothes") or user.get("baby"):
-            sellers.append({
-                "id": user.get("nickname"),
-                "nickname": user.get("nickname"),
-                "avatar": user.get("avatar", "/placeholder.svg"),
-                "bio": user.get("bio", ""),
-                "childrenTags": user.get("childrenTags", []),
-                "products": user.get("clothes", [])  # clothes 배열을 products로 매핑
-            })
-    
-    return {"code": 200, "data": sellers}
+    for seller in data:
+        sellers.append({
+            "id": seller.get("id"),
+            "nickname": seller.get("nickname"),
+            "avatar": seller.get("avatar"),
+            "bio": seller.get("bio"),
+            "childrenTags": seller.get("childrenTags"),
+            "products": seller.get("products")
+        })
+
+    return {
+        "code": 200,
+        "data": sellers,
+        "has_more": next_cursor is not None,
+        "next_cursor": next_cursor
+    }
+
+@router.get("/product")
+async def product(nickname: str, idx: int = Query(ge=0)):
+    """
+    판매 상품 상세 (유저 clothes 배열의 idx 번째)
+    """
+    user: dict = await modules.find_one(
+        "users", {"nickname": nickname}, {"nickname": 1, "clothes": {"$slice": [idx, 1]}}
+    )
+    if not user:
+        return {"code": 404, "message": "user not found."}
+    if not user.get("clothes"):
+        return {"code": 404, "message": "product not found."}
+    return {"code": 200, "data": {**user["clothes"][0], "idx": idx, "seller": nickname}}
 
 
+# /update_basic으로 바꿀 수 있는 문자열 필드.
+# nickname(세션/판매자 뷰/채팅 key가 걸려 있음), pw(/sign에서 해시해서 저장), _v 등은 제외
+BASIC_FIELDS = ["profile_photo", "avatar", "bio"]
+
 # ----- Pydantic 모델 -----
 class UpdateBasicModel(BaseModel):
     key: str
@@ -60,47 +98,69 @@ class UpdateWritingsModel(BaseModel):
     idx: int = -1
 
 # ----- 공통 함수 -----
-async def update(request: Request, key, val):
-    nickname: str = request.cookies.get("session") or ""
+async def user_exists(nickname: str) -> bool:
+    return bool(await modules.find_one("users", {"nickname": nickname}, {"nickname": 1}))
+
+async def update(nickname: str, key, val):
     if not nickname:
         return {"code": 401, "message": "Please login"}
-    document: dict = await modules.read("user", "data") or {}
-    data: list[dict] = document["data"]
-    user: dict = {}
-    for idx, item in enumerate(data):
-        if nickname == item.get("nickname"):
-            user = item
-            break
+    if modules.WRITE_BEHIND:
+        # 모았다가 한 번에 쓴다. 유저 존재 여부는 (캐시된) 조회로 확인
+        if not await user_exists(nickname):
+            return {"code": 404, "message": "user not found."}
+        await modules.profile_writes.submit(nickname, {"$set": {key: val}})
+        return {"code": 200, "message": "successfully fetched."}
+    if not await modules.update_one("users", {"nickname": nickname}, {key: val}):
+        return {"code": 404, "message": "user not found."}
+    if key in modules.SELLER_FIELDS:
+        await modules.refresh_seller(nickname)
+    return {"code": 200, "message": "successfully fetched."}
+
+async def update_list(nickname: str, key: str, idx: int, val):
+    """
+    유저의 배열 필드(baby, clothes, writings)에 추가(idx == -1) 또는 idx 위치 교체
+    """
+    if not nickname:
+        return {"code": 401, "message": "Please login"}
+    if idx == -1 and modules.WRITE_BEHIND:
+        if not await user_exists(nickname):
+            return {"code": 404, "message": "user not found."}
+        await modules.profile_writes.submit(nickname, {"$push": {key: val}})
+        return {"code": 200, "message": "successfully fetched."}
+    if modules.WRITE_BEHIND:
+        # idx 교체는 결과(범위 확인)가 필요해서 바로 쓴다. 앞서 모아 둔 추가가 먼저 반영되도록 flush
+        await modules.profile_writes.flush(nickname)
+        if modules.profile_writes.failed(nickname):
+            return {"code": 503, "message": "pending update not saved yet. try again."}
+
+    if idx == -1:
+        found = await modules.push("users", {"nickname": nickname}, key, val)
     else:
+        # idx 범위 확인과 교체를 한 번의 조건부 업데이트로 처리
+        found = await modules.update_one(
+            "users", {"nickname": nickname, f"{key}.{idx}": {"$exists": True}}, {f"{key}.{idx}": val}
+        )
+        if not found and await user_exists(nickname):
+            return {"code": 404, "message": "index out of range."}
+    if not found:
         return {"code": 404, "message": "user not found."}
-    user[key] = val
-    data[idx] = user
-    await modules.write("user", data)
+    if key in modules.SELLER_FIELDS:
+        await modules.refresh_seller(nickname)
     return {"code": 200, "message": "successfully fetched."}
 
 # ----- Endpoints -----
 @router.post("/update_basic")
-async def update_basic(request: Request, body: UpdateBasicModel):
-    return await update(request, body.key, body.val)
+async def update_basic(body: UpdateBasicModel, nickname: str = Depends(modules.current_user)):
+    if body.key not in BASIC_FIELDS:
+        return {"code": 400, "message": f"key must be one of {BASIC_FIELDS}"}
+    return await update(nickname, body.key, body.val)
 
 @router.post("/update_location")
-async def update_location(request: Request, body: UpdateLocationModel):
-    return await update(request, "location", [body.si, body.gu])
+async def update_location(body: UpdateLocationModel, nickname: str = Depends(modules.current_user)):
+    return await update(nickname, "location", [body.si, body.gu])
 
 @router.post("/update_baby")
-async def update_baby(request: Request, body: UpdateBabyModel):
-    nickname: str = request.cookies.get("session") or ""
-    if not nickname:
-        return {"code": 401, "message": "Please login"}
-    document: dict = await modules.read("user", "data") or {}
-    data: list[dict] = document["data"]
-    user: dict = {}
-    for _idx, item in enumerate(data):
-        if nickname == item.get("nickname"):
-            user = item
-            break
-    else:
-        return {"code": 404, "message": "user not found."}
+async def update_baby(body: UpdateBabyModel, nickname: str = Depends(modules.current_user)):
     baby_data = {
         "birth": body.birth,
         "height": body.height,
@@ -108,28 +168,10 @@ async def update_baby(request: Request, body: UpdateBabyModel):
         "sex": body.sex,
         "tags": body.tags
     }
-    if body.idx == -1:
-        user["baby"].append(baby_data)
-    else:
-        user["baby"][body.idx] = baby_data
-    data[_idx] = user
-    await modules.write("user", data)
-    return {"code": 200, "message": "successfully fetched."}
+    return await update_list(nickname, "baby", body.idx, baby_data)
 
 @router.post("/update_clothes")
-async def update_clothes(request: Request, body: UpdateClothesModel):
-    nickname: str = request.cookies.get("session") or ""
-    if not nickname:
-        return {"code": 401, "message": "Please login"}
-    document: dict = await modules.read("user", "data") or {}
-    data: list[dict] = document["data"]
-    user: dict = {}
-    for _idx, item in enumerate(data):
-        if nickname == item.get("nickname"):
-            user = item
-            break
-    else:
-        return {"code": 404, "message": "user not found."}
+async def update_clothes(body: UpdateClothesModel, nickname: str = Depends(modules.current_user)):
     clothes_data = {
         "title": body.title,
         "picture": body.picture,
@@ -138,32 +180,8 @@ async def update_clothes(request: Request, body: UpdateClothesModel):
         "content": body.content,
         "tags": body.tags
     }
-    if body.idx == -1:
-        user["clothes"].append(clothes_data)
-    else:
-        user["clothes"][body.idx] = clothes_data
-    data[_idx] = user
-    await modules.write("user", data)
-    return {"code": 200, "message": "successfully fetched."}
+    return await update_list(nickname, "clothes", body.idx, clothes_data)
 
 @router.post("/update_writings")
-async def update_writings(request: Request, body: UpdateWritingsModel):
-    nickname: str = request.cookies.get("session") or ""
-    if not nickname:
-        return {"code": 401, "message": "Please login"}
-    document: dict = await modules.read("user", "data") or {}
-    data: list[dict] = document["data"]
-    user: dict = {}
-    for _idx, item in enumerate(data):
-        if nickname == item.get("nickname"):
-            user = item
-            break
-    else:
-        return {"code": 404, "message": "user not found."}
-    if body.idx == -1:
-        user["writings"].append(body.writing_id)
-    else:
-        user["writings"][body.idx] = body.writing_id
-    data[_idx] = user
-    await modules.write("user", data)
-    return {"code": 200, "message": "successfully fetched."}
+async def update_writings(body: UpdateWritingsModel, nickname: str = Depends(modules.current_user)):
+    return await update_list(nickname, "writings", body.idx, body.writing_id)
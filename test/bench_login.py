@@ -0,0 +1,85 @@
+"""
+로그인 폭주 중 비밀번호 해시가 이벤트 루프를 얼마나 막는지 측정.
+
+- inline: 코루틴 안에서 hashlib.scrypt를 바로 호출 (루프가 멈춤)
+- pool:   modules.password의 스레드 풀에서 계산 (현재 방식)
+
+로그인 처리량과, 그동안 다른 엔드포인트(아무 일도 안 하는 코루틴)의
+응답 지연 p50/p99를 출력한다.
+
+사용법 (프로젝트 루트에서):
+    python test/bench_login.py [동시 로그인 수]
+"""
+import asyncio
+import importlib.util
+import pathlib
+import statistics
+import sys
+import time
+
+# modules 패키지 전체(motor 등)를 불러오지 않도록 password.py만 직접 로드
+path = pathlib.Path(__file__).resolve().parent.parent / "src" / "modules" / "password.py"
+spec = importlib.util.spec_from_file_location("password", path)
+password = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(password)
+
+
+async def login_inline(pw: str, stored: str) -> bool:
+    return password.verify_password_sync(pw, stored)[0]
+
+
+async def login_pool(pw: str, stored: str) -> bool:
+    return (await password.verify_password(pw, stored))[0]
+
+
+async def unrelated_requests(stop: asyncio.Event, latencies: list[float]):
+    """
+    5ms마다 가벼운 요청이 도착한다고 보고, 도착 시각부터 처리될 때까지 걸린 시간을 기록.
+    루프가 막혀 있던 동안 도착한 요청은 풀린 시점에 한꺼번에 처리된다.
+    """
+    interval = 0.005
+    due = time.perf_counter()
+    while not stop.is_set():
+        await asyncio.sleep(max(0.0, due - time.perf_counter()))
+        now = time.perf_counter()
+        while due <= now:
+            latencies.append((now - due) * 1000)
+            due += interval
+
+
+async def run(mode: str, logins: int, stored: str) -> dict:
+    login = login_inline if mode == "inline" else login_pool
+    latencies: list[float] = []
+    stop = asyncio.Event()
+    ticker = asyncio.create_task(unrelated_requests(stop, latencies))
+    await asyncio.sleep(0.05)
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*[login("secret", stored) for _ in range(logins)])
+    elapsed = time.perf_counter() - start
+
+    stop.set()
+    await ticker
+    assert all(results)
+    latencies.sort()
+    return {
+        "mode": mode,
+        "logins/s": logins / elapsed,
+        "p50_ms": statistics.median(latencies),
+        "p99_ms": latencies[int(len(latencies) * 0.99) - 1],
+    }
+
+
+def main():
+    logins = int(sys.argv[1]) if len(sys.argv) > 1 else 64
+    stored = password.hash_password_sync("secret")
+    print(f"scrypt N={password.SCRYPT_N} r={password.SCRYPT_R} p={password.SCRYPT_P}, "
+          f"workers={password.HASH_WORKERS}, logins={logins}")
+    for mode in ["inline", "pool"]:
+        result = asyncio.run(run(mode, logins, stored))
+        print(f"{result['mode']:>6}: {result['logins/s']:8.1f} logins/s, "
+              f"unrelated p50={result['p50_ms']:7.2f}ms p99={result['p99_ms']:7.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+/chat/chat 응답 직렬화 비용 비교.
+
+- model: 방마다 UserChat 모델 생성 -> response_model로 다시 검증 -> jsonable_encoder -> json
+         (FastAPI가 모델 응답을 처리하는 경로와 같은 순서)
+- orjson: DB에서 읽은 dict를 ORJSONResponse로 바로 인코딩 (현재 방식)
+
+사용법 (프로젝트 루트에서, 의존성 설치 후):
+    python test/bench_serialize.py [메시지 수 ...]
+"""
+import json
+import pathlib
+import sys
+import time
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent / "src"))
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import ORJSONResponse
+
+from routes.chat import UserChat, UserChatResponse
+
+ROOMS = 100
+
+
+def make_rooms(messages: int) -> list[dict]:
+    per_room = max(1, messages // ROOMS)
+    return [
+        {
+            "with": f"user{room}",
+            "log": [
+                {"who": f"user{room}", "when": "2025-11-23/12:00", "content": f"메시지 {i}", "seq": i}
+                for i in range(per_room)
+            ],
+        }
+        for room in range(ROOMS)
+    ]
+
+
+def model_path(rooms: list[dict]) -> bytes:
+    response = UserChatResponse(code=200, data=[UserChat(with_=room["with"], log=room["log"]) for room in rooms])
+    # FastAPI: 응답 모델을 dict로 풀고 response_model로 다시 검증한 뒤 인코딩
+    content = response.model_dump(by_alias=True)
+    validated = UserChatResponse.model_validate(content)
+    return json.dumps(jsonable_encoder(validated.model_dump(by_alias=True))).encode()
+
+
+def orjson_path(rooms: list[dict]) -> bytes:
+    return ORJSONResponse({"code": 200, "data": rooms}).body
+
+
+def timed(func, rooms) -> float:
+    start = time.perf_counter()
+    func(rooms)
+    return (time.perf_counter() - start) * 1000
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [10_000, 100_000, 1_000_000]
+    for size in sizes:
+        rooms = make_rooms(size)
+        assert json.loads(model_path(rooms[:1])) == json.loads(orjson_path(rooms[:1]))
+        model_ms = timed(model_path, rooms)
+        orjson_ms = timed(orjson_path, rooms)
+        print(f"{size:>9} messages: model {model_ms:9.1f}ms, orjson {orjson_ms:8.1f}ms "
+              f"({model_ms / orjson_ms:5.1f}x)")
+
+
+if __name__ == "__main__":
+    main()